@@ -6,24 +6,47 @@ Handles video chunk generation, stitching, and FFmpeg operations
 
 import argparse
 import os
+import sys
 import subprocess
 import logging
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
+from output_catalog import add_catalog_args, catalog_path, record_output
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def parse_args():
     parser = argparse.ArgumentParser(description='Manage video chunks and FFmpeg operations')
-    parser.add_argument('--input_dir', type=str, required=True, help='Input directory with video chunks')
-    parser.add_argument('--output_path', type=str, required=True, help='Final output video path')
+    parser.add_argument('--input_dir', type=str, help='Input directory with video chunks')
+    parser.add_argument('--output_path', type=str, help='Final output video path')
     parser.add_argument('--add_audio', type=str, help='Audio file to add')
     parser.add_argument('--add_effects', type=bool, default=False, help='Apply video effects')
     parser.add_argument('--resolution', type=str, default='1080p', help='Target resolution')
-    return parser.parse_args()
+    parser.add_argument('--job_id', type=str, help='Job ID for the catalog entry (default: the job ID in the chunk metadata)')
+    add_catalog_args(parser)
+    parser.add_argument('--batch_manifest', type=str,
+                        help='JSON list of jobs ({"input_dir", "output_path", "job_id", "add_audio", "add_effects", "resolution"}) to post-process together')
+    parser.add_argument('--input_dirs', type=str, nargs='+', help='Job directories to post-process together')
+    parser.add_argument('--output_root', type=str, help='Directory for --input_dirs outputs (default: next to each job directory)')
+    parser.add_argument('--max_processes', type=int, default=0, help='Concurrent FFmpeg processes in batch mode (0 = cores / --ffmpeg_threads)')
+    parser.add_argument('--ffmpeg_threads', type=int, default=2, help='Threads per FFmpeg process in batch mode')
+    parser.add_argument('--report', type=str, help='Write the batch summary report to this JSON file')
+    args = parser.parse_args()
+    if not args.batch_manifest and not args.input_dirs and not (args.input_dir and args.output_path):
+        parser.error('--input_dir and --output_path, --input_dirs or --batch_manifest is required')
+    return args
+
+def thread_args(threads):
+    """
+    FFmpeg arguments capping its thread count (0 = FFmpeg's default)
+    """
+    return ['-threads', str(threads)] if threads else []
 
 def find_video_chunks(input_dir):
     """
@@ -33,20 +56,23 @@ def find_video_chunks(input_dir):
     chunks = []
     
     for file in Path(input_dir).iterdir():
-        if file.suffix.lower() in video_extensions:
+        # Preview clips are a low-res copy of the same job, not a chunk
+        if file.suffix.lower() in video_extensions and not file.name.startswith('preview_'):
             chunks.append(str(file))
     
     # Sort chunks by name to maintain order
     chunks.sort()
     return chunks
 
-def stitch_chunks_ffmpeg(chunks, output_path):
+def stitch_chunks_ffmpeg(chunks, output_path, threads=0):
     """
     Stitch video chunks together using FFmpeg
     """
     try:
+        concat_file = None
         if len(chunks) == 1:
-            # Only one chunk, just copy it            cmd = ['ffmpeg', '-i', chunks[0], '-c', 'copy', output_path, '-y']
+            # Only one chunk, just copy it
+            cmd = ['ffmpeg', '-i', chunks[0], '-c', 'copy'] + thread_args(threads) + [output_path, '-y']
         else:
             # Multiple chunks, use concat demuxer
             # Create a temporary file listing all chunks
@@ -62,6 +88,7 @@ def stitch_chunks_ffmpeg(chunks, output_path):
                 '-safe', '0',
                 '-i', concat_file,
                 '-c', 'copy',
+                *thread_args(threads),
                 output_path,
                 '-y'
             ]
@@ -73,7 +100,7 @@ def stitch_chunks_ffmpeg(chunks, output_path):
             raise Exception(f"FFmpeg failed: {result.stderr}")
         
         # Clean up concat file
-        if os.path.exists(concat_file):
+        if concat_file and os.path.exists(concat_file):
             os.remove(concat_file)
         
         logger.info(f"Successfully stitched {len(chunks)} chunks to {output_path}")
@@ -83,7 +110,7 @@ def stitch_chunks_ffmpeg(chunks, output_path):
         logger.error(f"Error stitching chunks: {str(e)}")
         raise
 
-def add_audio_to_video(video_path, audio_path, output_path):
+def add_audio_to_video(video_path, audio_path, output_path, threads=0):
     """
     Add audio track to video using FFmpeg
     """
@@ -95,7 +122,9 @@ def add_audio_to_video(video_path, audio_path, output_path):
             '-c:v', 'copy',
             '-c:a', 'aac',
             '-strict', 'experimental',
-            output_path,            '-y'
+            *thread_args(threads),
+            output_path,
+            '-y'
         ]
         
         logger.info(f"Adding audio with FFmpeg: {' '.join(cmd)}")
@@ -111,7 +140,7 @@ def add_audio_to_video(video_path, audio_path, output_path):
         logger.error(f"Error adding audio: {str(e)}")
         raise
 
-def apply_effects(video_path, output_path, effects_config=None):
+def apply_effects(video_path, output_path, effects_config=None, threads=0):
     """
     Apply video effects using FFmpeg
     """
@@ -119,15 +148,20 @@ def apply_effects(video_path, output_path, effects_config=None):
         cmd = ['ffmpeg', '-i', video_path]
         
         # Add effects based on configuration
+        filters = []
         if effects_config:
             # Example: add fade-in/fade-out
             if effects_config.get('fade_in'):
-                cmd.extend(['-vf', f"fade=t=in:st=0:d={effects_config['fade_in']}"])
+                filters.append(f"fade=t=in:st=0:d={effects_config['fade_in']}")
             
             if effects_config.get('fade_out'):
-                cmd.extend(['-vf', f"fade=t=out:st={effects_config['fade_out']['start']}:d={effects_config['fade_out']['duration']}"])
+                filters.append(f"fade=t=out:st={effects_config['fade_out']['start']}:d={effects_config['fade_out']['duration']}")
+        
+        # A second -vf would replace the first, so chain the filters
+        if filters:
+            cmd.extend(['-vf', ','.join(filters)])
         
-        cmd.extend([output_path, '-y'])
+        cmd.extend(thread_args(threads) + [output_path, '-y'])
         
         logger.info(f"Applying effects with FFmpeg: {' '.join(cmd)}")
         result = subprocess.run(cmd, capture_output=True, text=True)
@@ -142,15 +176,17 @@ def apply_effects(video_path, output_path, effects_config=None):
         logger.error(f"Error applying effects: {str(e)}")
         raise
 
-def generate_thumbnail(video_path, thumbnail_path):
+def generate_thumbnail(video_path, thumbnail_path, threads=0):
+    """
+    Generate thumbnail from video using FFmpeg
     """
-    Generate thumbnail from video using FFmpeg    """
     try:
         cmd = [
             'ffmpeg',
             '-i', video_path,
             '-ss', '00:00:01.000',  # Take thumbnail at 1 second
             '-vframes', '1',
+            *thread_args(threads),
             thumbnail_path,
             '-y'
         ]
@@ -168,66 +204,212 @@ def generate_thumbnail(video_path, thumbnail_path):
         logger.error(f"Error generating thumbnail: {str(e)}")
         raise
 
-def main():
-    args = parse_args()
+def read_chunk_metadata(chunk):
+    """
+    Return the generator metadata written next to a chunk, if any
+    """
+    metadata_path = os.path.splitext(chunk)[0] + '_metadata.json'
+    if not os.path.exists(metadata_path):
+        return {}
+    with open(metadata_path) as f:
+        return json.load(f)
+
+def process_job(job, threads=0):
+    """
+    Stitch one job's chunks, apply effects and audio, thumbnail and catalog it
+
+    Returns the final output path. Intermediate files are removed even when a
+    step fails, so a failed job leaves nothing behind for the rest of a batch.
+    """
+    input_dir, output_path = job["input_dir"], job["output_path"]
+    logger.info(f"Starting chunk management for directory: {input_dir}")
+    
+    # Find all video chunks
+    chunks = find_video_chunks(input_dir)
+    logger.info(f"Found {len(chunks)} video chunks")
     
-    logger.info(f"Starting chunk management for directory: {args.input_dir}")
+    if not chunks:
+        raise Exception("No video chunks found in input directory")
+    
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    
+    # Create temp output for stitched video
+    temp_output = output_path.replace('.mp4', '_temp.mp4')
+    effects_output = output_path.replace('.mp4', '_effects.mp4')
     
     try:
-        # Find all video chunks
-        chunks = find_video_chunks(args.input_dir)
-        logger.info(f"Found {len(chunks)} video chunks")
-        
-        if not chunks:
-            raise Exception("No video chunks found in input directory")
-        
-        # Create temp output for stitched video
-        temp_output = args.output_path.replace('.mp4', '_temp.mp4')
-        
         # Stitch chunks together
-        stitch_chunks_ffmpeg(chunks, temp_output)
+        stitch_chunks_ffmpeg(chunks, temp_output, threads)
         
         # Apply effects if requested
         final_output = temp_output
-        if args.add_effects:
+        if job.get("add_effects"):
             effects_config = {
                 'fade_in': 1.0,
                 'fade_out': {'start': 29.0, 'duration': 1.0}  # Assuming 30-second video
-            }            effects_output = args.output_path.replace('.mp4', '_effects.mp4')
-            apply_effects(temp_output, effects_output, effects_config)
+            }
+            apply_effects(temp_output, effects_output, effects_config, threads)
             final_output = effects_output
         
         # Add audio if provided
-        if args.add_audio:
-            audio_output = args.output_path
-            add_audio_to_video(final_output, args.add_audio, audio_output)
+        if job.get("add_audio"):
+            add_audio_to_video(final_output, job["add_audio"], output_path, threads)
         else:
             # Just rename/move the final output
-            os.rename(final_output, args.output_path)
-        
-        # Generate thumbnail
-        thumbnail_path = args.output_path.replace('.mp4', '.jpg')
-        generate_thumbnail(args.output_path, thumbnail_path)
-        
-        # Create metadata
-        metadata = {
-            "operation": "chunk_management",
-            "input_chunks": len(chunks),
-            "input_directory": args.input_dir,
-            "output_file": args.output_path,
-            "thumbnail": thumbnail_path,
-            "resolution": args.resolution,
-            "processed_at": datetime.utcnow().isoformat()
-        }
+            os.rename(final_output, output_path)
+    finally:
+        for path in (temp_output, effects_output):
+            if os.path.exists(path):
+                os.remove(path)
+    
+    # Generate thumbnail
+    thumbnail_path = output_path.replace('.mp4', '.jpg')
+    generate_thumbnail(output_path, thumbnail_path, threads)
+    
+    # Create metadata
+    metadata = {
+        "operation": "chunk_management",
+        "input_chunks": len(chunks),
+        "input_directory": input_dir,
+        "output_file": output_path,
+        "thumbnail": thumbnail_path,
+        "resolution": job.get("resolution", "1080p"),
+        "processed_at": datetime.utcnow().isoformat()
+    }
+    
+    # Carry the job ID, prompt and style of the generated chunks into the catalog entry
+    chunk_metadata = read_chunk_metadata(chunks[0])
+    job_id = job.get("job_id") or chunk_metadata.get("job_id")
+    if job_id:
+        metadata["job_id"] = job_id
+    if chunk_metadata.get("prompt"):
+        metadata["prompt"] = chunk_metadata["prompt"]
+        metadata["duration"] = sum(read_chunk_metadata(c).get("duration", 0) for c in chunks)
+    
+    metadata_path = output_path.replace('.mp4', '_metadata.json')
+    with open(metadata_path, 'w') as f:
+        json.dump(metadata, f, indent=2)
+    
+    catalog_db = catalog_path(job.get("catalog_db"))
+    record_output(catalog_db, "stitched", output_path, metadata, style=chunk_metadata.get("style"),
+                  job_id=job_id, metadata_path=metadata_path, thumbnail_path=thumbnail_path)
+    
+    logger.info(f"Final video: {output_path}")
+    logger.info(f"Thumbnail: {thumbnail_path}")
+    logger.info(f"Metadata: {metadata_path}")
+    return output_path
+
+def load_batch(args):
+    """
+    Build the batch job list from --batch_manifest or --input_dirs
+    """
+    if args.batch_manifest:
+        with open(args.batch_manifest) as f:
+            specs = json.load(f)
+    else:
+        specs = []
+        for input_dir in args.input_dirs:
+            # Outputs go next to the job directory so a re-run doesn't pick them up as chunks
+            input_dir = os.path.normpath(input_dir)
+            output_root = args.output_root or os.path.dirname(input_dir)
+            specs.append({"input_dir": input_dir,
+                          "output_path": os.path.join(output_root, f"{os.path.basename(input_dir)}.mp4")})
+    
+    jobs = []
+    for spec in specs:
+        jobs.append({
+            "input_dir": spec["input_dir"],
+            "output_path": spec["output_path"],
+            "job_id": spec.get("job_id"),
+            "add_audio": spec.get("add_audio", args.add_audio),
+            "add_effects": spec.get("add_effects", args.add_effects),
+            "resolution": spec.get("resolution", args.resolution),
+            "catalog_db": spec.get("catalog_db", args.catalog_db),
+        })
+    return jobs
+
+def batch_concurrency(ffmpeg_threads, max_processes=0):
+    """
+    Number of FFmpeg processes to run at once: enough to fill the cores at `ffmpeg_threads` each
+    """
+    if max_processes:
+        return max_processes
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    return max(1, cores // max(ffmpeg_threads, 1))
+
+def run_batch(jobs, ffmpeg_threads=2, max_processes=0):
+    """
+    Post-process many jobs with a bounded number of concurrent FFmpeg processes
+
+    Each job's steps run in sequence, so a job holds at most one FFmpeg
+    process and the worker count bounds the processes. A failing job is
+    recorded in its result without affecting the others.
+    """
+    processes = batch_concurrency(ffmpeg_threads, max_processes)
+    logger.info(f"Post-processing {len(jobs)} job(s) with {processes} FFmpeg process(es) "
+                f"of {ffmpeg_threads} thread(s)")
+    
+    def run(job):
+        start = time.perf_counter()
+        result = {"input_dir": job["input_dir"], "output_path": job["output_path"], "error": None}
+        try:
+            process_job(job, ffmpeg_threads)
+        except Exception as e:
+            logger.error(f"Chunk management failed for {job['input_dir']}: {str(e)}")
+            result["error"] = str(e)
+        result["elapsed_seconds"] = round(time.perf_counter() - start, 3)
+        return result
+    
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=processes, thread_name_prefix="ffmpeg-job") as executor:
+        results = list(executor.map(run, jobs))
+    
+    failed = sum(1 for result in results if result["error"] is not None)
+    return {
+        "jobs": len(results),
+        "succeeded": len(results) - failed,
+        "failed": failed,
+        "ffmpeg_processes": processes,
+        "ffmpeg_threads": ffmpeg_threads,
+        "elapsed_seconds": round(time.perf_counter() - start, 3),
+        "results": results
+    }
+
+def main():
+    args = parse_args()
+    
+    if args.batch_manifest or args.input_dirs:
+        try:
+            report = run_batch(load_batch(args), args.ffmpeg_threads, args.max_processes)
+        except Exception as e:
+            logger.error(f"Batch chunk management failed: {str(e)}")
+            print(f"ERROR: {str(e)}")
+            sys.exit(1)
         
-        metadata_path = args.output_path.replace('.mp4', '_metadata.json')
-        with open(metadata_path, 'w') as f:
-            json.dump(metadata, f, indent=2)
+        if args.report:
+            with open(args.report, 'w') as f:
+                json.dump(report, f, indent=2)
         
+        # Print one completion line per job for the parent process, then the summary
+        for result in report["results"]:
+            if result["error"] is None:
+                print(f"SUCCESS: Video processing completed at {result['output_path']}")
+            else:
+                print(f"ERROR: {result['input_dir']}: {result['error']}")
+        print(f"BATCH_SUMMARY: {json.dumps({k: v for k, v in report.items() if k != 'results'})}")
+        sys.exit(1 if report["failed"] else 0)
+    
+    try:
+        process_job({
+            "input_dir": args.input_dir,
+            "output_path": args.output_path,
+            "job_id": args.job_id,
+            "add_audio": args.add_audio,
+            "add_effects": args.add_effects,
+            "resolution": args.resolution,
+            "catalog_db": args.catalog_db,
+        })
         logger.info(f"Chunk management completed successfully!")
-        logger.info(f"Final video: {args.output_path}")
-        logger.info(f"Thumbnail: {thumbnail_path}")
-        logger.info(f"Meta {metadata_path}")
         
         # Print completion message for parent process
         print(f"SUCCESS: Video processing completed at {args.output_path}")
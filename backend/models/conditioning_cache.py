@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Conditioning Cache
+Reuses the CLIP image embeddings and VAE conditioning latents of images the
+Stable Video Diffusion pipeline has already encoded
+"""
+
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import torch
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "ghost_creators", "conditioning")
+
+def image_hash(image):
+    """
+    Content hash of a PIL image or tensor
+    """
+    digest = hashlib.sha256()
+    if isinstance(image, torch.Tensor):
+        array = image.detach().cpu().numpy()
+        digest.update(f"tensor:{array.dtype}:{array.shape}".encode())
+    else:
+        array = np.asarray(image)
+        digest.update(f"{image.mode}:{image.size}".encode())
+    digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+class ConditioningCache:
+    """
+    Two-level (in-memory LRU, then disk) cache of encoder outputs
+
+    Keys are hashes of the image content plus everything else the encoder
+    output depends on: model, dtype, output size and batch layout. Disk
+    entries are written atomically, so forked pool workers and concurrent
+    jobs can share one directory. Every segment conditions on a new frame,
+    so the directory is capped at `max_disk_mb`, evicting the least recently
+    used entries first.
+    """
+
+    def __init__(self, model_id, cache_dir=DEFAULT_CACHE_DIR, max_entries=64, max_disk_mb=1024):
+        self.model_id = model_id
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_disk_mb = max_disk_mb
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, *parts):
+        return hashlib.sha256(repr((self.model_id,) + parts).encode()).hexdigest()
+
+    def get_or_compute(self, key, compute, device):
+        """
+        Return the cached tensor for a key, computing and storing it on a miss
+        """
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits["memory"] += 1
+                return self.entries[key]
+
+        path = os.path.join(self.cache_dir, f"{key}.pt") if self.cache_dir else None
+        if path and os.path.exists(path):
+            try:
+                value = torch.load(path, map_location=device)
+                os.utime(path)  # Mark it recently used so eviction keeps it
+                self.hits["disk"] += 1
+                self._remember(key, value)
+                return value
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable conditioning cache entry {path}: {str(e)}")
+
+        value = compute()
+        self.misses += 1
+        self._remember(key, value)
+        if path:
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            torch.save(value.detach().cpu(), tmp_path)
+            os.replace(tmp_path, path)
+            self._evict_disk()
+        return value
+
+    def _evict_disk(self):
+        """
+        Remove the least recently used disk entries until the directory fits in max_disk_mb
+        """
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".pt"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue  # Evicted by another process
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        limit = self.max_disk_mb * 1024 * 1024
+        for _, size, path in sorted(entries):
+            if total <= limit:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def _remember(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+class CachedConditioningPipeline:
+    """
+    Wrap a StableVideoDiffusionPipeline so repeat conditioning images skip
+    the CLIP image encoder and the VAE encoder
+
+    The VAE encodes the conditioning image after noise augmentation, so its
+    cache key covers the requested size and noise strength. A cached latent
+    therefore reuses the augmentation noise of the first encode of that image.
+    Everything else behaves like the wrapped pipeline.
+    """
+
+    def __init__(self, pipe, cache):
+        self.pipe = pipe
+        self.cache = cache
+        self.local = threading.local()  # Conditioning key of the call running on this thread
+
+        encode_image, encode_vae_image = pipe._encode_image, pipe._encode_vae_image
+
+        def cached_encode_image(image, device, num_videos_per_prompt, do_classifier_free_guidance):
+            key = self.cache.key("clip", self.local.image_hash, str(pipe.image_encoder.dtype),
+                                 num_videos_per_prompt, do_classifier_free_guidance)
+            return self.cache.get_or_compute(key, lambda: encode_image(
+                image, device, num_videos_per_prompt, do_classifier_free_guidance), device)
+
+        def cached_encode_vae_image(image, device, num_videos_per_prompt, do_classifier_free_guidance):
+            key = self.cache.key("vae", self.local.image_hash, self.local.vae_params, str(pipe.vae.dtype),
+                                 num_videos_per_prompt, do_classifier_free_guidance)
+            return self.cache.get_or_compute(key, lambda: encode_vae_image(
+                image, device, num_videos_per_prompt, do_classifier_free_guidance), device)
+
+        pipe._encode_image = cached_encode_image
+        pipe._encode_vae_image = cached_encode_vae_image
+
+    def __call__(self, image, **kwargs):
+        self.local.image_hash = image_hash(image)
+        self.local.vae_params = (kwargs.get("height"), kwargs.get("width"), kwargs.get("noise_aug_strength", 0.02))
+        return self.pipe(image, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.pipe, name)
+
+def cached_conditioning(pipe, model_id, cache_dir=DEFAULT_CACHE_DIR, max_entries=64, max_disk_mb=1024):
+    """
+    Attach a conditioning cache to a loaded pipeline; max_entries=0 disables it
+    """
+    if max_entries <= 0:
+        return pipe
+    disk = f"{cache_dir}, up to {max_disk_mb} MB" if cache_dir else "off"
+    logger.info(f"Caching conditioning encodings (memory: {max_entries} entries, disk: {disk})")
+    return CachedConditioningPipeline(pipe, ConditioningCache(model_id, cache_dir, max_entries, max_disk_mb))
+
+def add_conditioning_cache_args(parser):
+    """
+    Add the conditioning cache options
+    """
+    parser.add_argument('--conditioning_cache_dir', type=str,
+                        default=os.environ.get("CONDITIONING_CACHE_DIR", DEFAULT_CACHE_DIR),
+                        help='Directory for cached image embeddings and latents ("" = memory only)')
+    parser.add_argument('--conditioning_cache_entries', type=int, default=64,
+                        help='Conditioning encodings kept in memory (0 = no cache)')
+    parser.add_argument('--conditioning_cache_disk_mb', type=int, default=1024,
+                        help='Size cap of the conditioning cache directory; least recently used entries are evicted')
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Shared-Memory Frame Buffer
+Ring of fixed-size RGB frame slots shared between a generator process and an
+encoder process, so frames are handed over without pickling or copying
+"""
+
+import argparse
+import logging
+import multiprocessing as mp
+import subprocess
+import tempfile
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class FrameRing:
+    """
+    Single-producer, single-consumer ring of uint8 (H, W, 3) frame slots
+
+    The producer fills the slot returned by `acquire_write` and hands it over
+    with `commit_write`; the consumer reads the slot returned by
+    `acquire_read` and frees it with `release_read`. When every slot is full
+    the producer blocks, which is the backpressure on generation.
+    """
+
+    def __init__(self, height, width, slots=8, ctx=None):
+        ctx = ctx or mp.get_context()
+        self.shape = (slots, height, width, 3)
+        self.slots = slots
+        self.shm = shared_memory.SharedMemory(create=True, size=int(np.prod(self.shape)))
+        self.owner = True
+        self.free = ctx.Semaphore(slots)
+        self.filled = ctx.Semaphore(0)
+        self.written = ctx.Value('q', 0, lock=False)  # Frames committed by the producer
+        self.closed = ctx.Value('b', 0, lock=False)
+        self.read_count = 0  # Local to the consumer
+        self._attach()
+
+    def _attach(self):
+        self.frames = np.ndarray(self.shape, dtype=np.uint8, buffer=self.shm.buf)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["frames"]
+        state["owner"] = False
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._attach()
+
+    def acquire_write(self, timeout=None):
+        """
+        Wait for a free slot and return it as a writable array view
+        """
+        if not self.free.acquire(timeout=timeout):
+            raise TimeoutError("No free frame slot (encoder is not keeping up)")
+        return self.frames[self.written.value % self.slots]
+
+    def commit_write(self):
+        """
+        Hand the slot filled since `acquire_write` to the consumer
+        """
+        self.written.value += 1
+        self.filled.release()
+
+    def close_writer(self):
+        """
+        Mark the end of the stream; the consumer drains what is left
+        """
+        self.closed.value = 1
+        self.filled.release()
+
+    def acquire_read(self, timeout=None):
+        """
+        Wait for the next filled slot and return it, or None at end of stream
+        """
+        while True:
+            if not self.filled.acquire(timeout=timeout):
+                raise TimeoutError("No frame produced in time (generator stalled)")
+            if self.read_count < self.written.value:
+                return self.frames[self.read_count % self.slots]
+            if self.closed.value:
+                return None
+
+    def release_read(self):
+        """
+        Return the slot read since `acquire_read` to the producer
+        """
+        self.read_count += 1
+        self.free.release()
+
+    def __iter__(self):
+        while True:
+            frame = self.acquire_read()
+            if frame is None:
+                return
+            yield frame
+            self.release_read()
+
+    def close(self):
+        self.frames = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+def encode_ring_ffmpeg(ring, output_path, fps):
+    """
+    Encode frames from the ring with FFmpeg, writing each slot straight from
+    shared memory to the encoder's stdin
+    """
+    _, height, width, _ = ring.shape
+    cmd = [
+        'ffmpeg', '-y', '-nostats', '-loglevel', 'error',
+        '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+        '-s', f'{width}x{height}', '-r', str(fps),
+        '-i', '-',
+        '-c:v', 'libx264', '-pix_fmt', 'yuv420p',
+        output_path
+    ]
+    # stderr goes to a file: an unread pipe fills up and stalls FFmpeg while we block writing stdin
+    with tempfile.TemporaryFile() as log:
+        process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=log)
+        count, broken = 0, False
+        for frame in ring:
+            if broken:
+                continue  # Keep draining so the producer isn't left blocked on a full ring
+            try:
+                process.stdin.write(frame.data)
+                count += 1
+            except BrokenPipeError:
+                broken = True  # FFmpeg exited early; its log explains why
+        try:
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+        process.wait()
+        if process.returncode != 0:
+            log.seek(0)
+            raise Exception(f"FFmpeg encoding failed: {log.read().decode(errors='replace')}")
+    logger.info(f"Encoded {count} frames from shared memory to {output_path}")
+    return count
+
+def _render_frame(out, index):
+    # Cheap deterministic content so the benchmark measures transport, not drawing
+    out[...] = index % 255
+
+def _consume(frame):
+    # Touch every row like an encoder would
+    return int(frame[:, ::64].sum())
+
+def _pil_producer(frame_queue, num_frames, height, width):
+    from PIL import Image
+    buffer = np.empty((height, width, 3), dtype=np.uint8)
+    for i in range(num_frames):
+        _render_frame(buffer, i)
+        frame_queue.put(Image.fromarray(buffer))
+    frame_queue.put(None)
+
+def _ring_producer(ring, num_frames):
+    for i in range(num_frames):
+        _render_frame(ring.acquire_write(), i)
+        ring.commit_write()
+    ring.close_writer()
+
+def benchmark_pil(num_frames, height, width):
+    """
+    Current path: PIL frames pickled through a queue to the encoder process
+    """
+    frame_queue = mp.Queue(maxsize=8)
+    producer = mp.Process(target=_pil_producer, args=(frame_queue, num_frames, height, width))
+    start = time.perf_counter()
+    producer.start()
+    while True:
+        image = frame_queue.get()
+        if image is None:
+            break
+        _consume(np.asarray(image))
+    producer.join()
+    return time.perf_counter() - start
+
+def benchmark_ring(num_frames, height, width, slots):
+    """
+    Shared-memory ring: slots handed over by index, no pickling or copies
+    """
+    ring = FrameRing(height, width, slots)
+    producer = mp.Process(target=_ring_producer, args=(ring, num_frames))
+    start = time.perf_counter()
+    producer.start()
+    for frame in ring:
+        _consume(frame)
+    producer.join()
+    elapsed = time.perf_counter() - start
+    ring.close()
+    return elapsed
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark frame handoff between generator and encoder processes')
+    parser.add_argument('--frames', type=int, default=300, help='Frames to transfer')
+    parser.add_argument('--resolution', type=str, default='1080p', help='Frame resolution (720p or 1080p)')
+    parser.add_argument('--slots', type=int, default=8, help='Ring slots')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    width, height = (1920, 1080) if args.resolution == "1080p" else (1280, 720)
+    frame_mb = height * width * 3 / 1e6
+
+    logger.info(f"Transferring {args.frames} frames of {width}x{height} ({frame_mb:.1f} MB each)")
+    pil_time = benchmark_pil(args.frames, height, width)
+    ring_time = benchmark_ring(args.frames, height, width, args.slots)
+
+    print("BENCHMARK:")
+    for name, elapsed in (("list-of-PIL queue", pil_time), ("shared-memory ring", ring_time)):
+        print(f"  {name}: {elapsed:.3f}s, {args.frames / elapsed:.1f} fps, "
+              f"{args.frames * frame_mb / elapsed:.0f} MB/s")
+    print(f"  speedup: {pil_time / ring_time:.2f}x")
+
+if __name__ == "__main__":
+    main()
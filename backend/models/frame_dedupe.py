@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Duplicate Frame Merging
+Collapses runs of near-identical frames and encodes the rest as a
+variable-frame-rate stream
+"""
+
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+
+import numpy as np
+from PIL import Image
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SIGNATURE_SIZE = (64, 36)  # Grayscale thumbnail compared between frames (16x16 cells at 1024x576)
+MAX_HOLD_SECONDS = 2.0  # Longest a merged frame is held, keeps seeking responsive
+
+def frame_signature(frame):
+    """
+    Cheap fingerprint of a PIL frame: a small grayscale thumbnail
+    """
+    return np.asarray(frame.convert("L").resize(SIGNATURE_SIZE, Image.BOX), dtype=np.int16)
+
+class DuplicateFrameMerger:
+    """
+    Running merge of near-identical consecutive frames, fed one frame at a time
+
+    `durations[i]` is how many frames at `fps` the i-th kept frame is shown
+    for. A frame is a duplicate when no thumbnail cell differs by `threshold`
+    or more (0-255 scale) from the last kept frame: cells average out
+    generation noise while a small local change, such as a fading caption,
+    still registers. Comparing against the last kept frame rather than the
+    neighbour means slow drift still adds up to a new frame.
+    """
+
+    def __init__(self, fps, threshold=3.0):
+        self.threshold = threshold
+        self.max_hold = max(1, int(MAX_HOLD_SECONDS * fps))
+        self.durations = []
+        self.reference = None
+
+    def add(self, frame):
+        """
+        Take the next PIL frame; returns False when it was merged into the last kept frame
+        """
+        if self.threshold > 0:
+            signature = frame_signature(frame)
+            if (self.durations and self.durations[-1] < self.max_hold
+                    and np.abs(signature - self.reference).max() < self.threshold):
+                self.durations[-1] += 1
+                return False
+            self.reference = signature
+        self.durations.append(1)
+        return True
+
+def merge_duplicate_frames(frames, fps, threshold=3.0):
+    """
+    Drop frames that barely differ from the last kept frame
+
+    Returns (kept_frames, durations); see DuplicateFrameMerger.
+    """
+    merger = DuplicateFrameMerger(fps, threshold)
+    kept = [frame for frame in frames if merger.add(frame)]
+    return kept, merger.durations
+
+class VFRWriter:
+    """
+    Encode frames as they arrive, merging runs of near-identical frames into a
+    variable-frame-rate stream
+
+    Kept frames are spooled to PNGs in a scratch directory next to the output
+    and encoded with FFmpeg's concat demuxer on `close`, so memory holds one
+    batch of frames however long the video is. `resize(batch)` is applied to
+    each kept frame before it is spooled, and `filters` is an FFmpeg filter
+    chain applied while encoding.
+    """
+
+    def __init__(self, output_path, fps, threshold=3.0, filters=None, resize=None):
+        self.output_path = output_path
+        self.fps = fps
+        self.filters = filters or []
+        self.resize = resize
+        self.merger = DuplicateFrameMerger(fps, threshold)
+        self.frames_written = 0
+        self.workdir = tempfile.mkdtemp(dir=os.path.dirname(output_path) or ".")
+
+    @property
+    def durations(self):
+        return self.merger.durations
+
+    def write(self, frames):
+        """
+        Append a uint8 (N, H, W, 3) batch of frames
+        """
+        for frame in frames:
+            image = Image.fromarray(frame)
+            if self.merger.add(image):
+                if self.resize:
+                    image = Image.fromarray(self.resize(frame[None])[0])
+                name = f"frame_{len(self.durations) - 1:06d}.png"
+                image.save(os.path.join(self.workdir, name), compress_level=1)
+        self.frames_written += len(frames)
+
+    def close(self):
+        """
+        Encode the spooled frames with their durations and remove the scratch directory
+        """
+        try:
+            if not self.durations:
+                raise Exception("No frames to encode")
+            lines = ["ffconcat version 1.0"]
+            for i, duration in enumerate(self.durations):
+                name = f"frame_{i:06d}.png"
+                # The frame rate option puts timestamps on the 1/fps grid instead of the 1/25 default
+                lines += [f"file '{name}'", f"option framerate {self.fps}"]
+                if i < len(self.durations) - 1:
+                    lines.append(f"duration {duration / self.fps:.6f}")
+                elif duration > 1:
+                    # The last entry is only shown for one frame, so repeat it to hold the rest
+                    lines += [f"duration {(duration - 1) / self.fps:.6f}", f"file '{name}'",
+                              f"option framerate {self.fps}"]
+
+            concat_path = os.path.join(self.workdir, "frames.ffconcat")
+            with open(concat_path, 'w') as f:
+                f.write("\n".join(lines) + "\n")
+
+            cmd = ['ffmpeg', '-f', 'concat', '-safe', '0', '-i', concat_path, '-vsync', 'vfr']
+            if self.filters:
+                cmd += ['-vf', ','.join(self.filters)]
+            cmd += ['-c:v', 'libx264', '-pix_fmt', 'yuv420p', self.output_path, '-y']
+            logger.info(f"Encoding {self.frames_written} frames as {len(self.durations)} distinct "
+                        f"variable frame rate frames: {self.output_path}")
+            result = subprocess.run(cmd, capture_output=True, text=True)
+            if result.returncode != 0:
+                raise Exception(f"FFmpeg VFR encode failed: {result.stderr}")
+        finally:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def abort(self):
+        """
+        Drop the spooled frames without encoding them
+        """
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+def add_dedupe_args(parser):
+    """
+    Add the duplicate frame merging option
+    """
+    parser.add_argument('--dedupe_threshold', type=float, default=3.0,
+                        help='Largest thumbnail cell difference (0-255) below which frames are merged (0 = off)')
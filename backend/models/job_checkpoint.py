@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Job Checkpointing
+Saves generated segments and their conditioning frames with a manifest so a
+re-launched job resumes from the last good segment
+"""
+
+import fcntl
+import hashlib
+import json
+import logging
+import os
+
+import numpy as np
+from PIL import Image
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SEGMENT_FRAMES = 25  # Frames per SVD-XT call
+
+def _atomic_write_json(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+def _sha256(array):
+    return hashlib.sha256(np.ascontiguousarray(array).data).hexdigest()
+
+class JobCheckpoint:
+    """
+    Segment checkpoints for one job, stored under `directory`
+
+    The manifest lists each completed segment with its frame count and a
+    SHA-256 of its pixels. It is only rewritten after a segment file is fully
+    on disk, so a job killed mid-write leaves at most an orphaned file.
+
+    Opening a checkpoint takes an exclusive lock on it until `close` (or the
+    process exits), so a retry launched while an earlier attempt of the same
+    job is still running fails fast instead of writing the same segments.
+    """
+
+    def __init__(self, directory, job_id, params):
+        self.directory = directory
+        self.job_id = job_id
+        self.params = params
+        self.manifest_path = os.path.join(directory, "manifest.json")
+        os.makedirs(directory, exist_ok=True)
+        self.lock_file = open(os.path.join(directory, "lock"), 'w')
+        try:
+            fcntl.flock(self.lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self.lock_file.close()
+            raise RuntimeError(f"Job {job_id} is already running in another process")
+        self.manifest = self._load()
+
+    def _fresh(self):
+        return {"job_id": self.job_id, "params": self.params, "segments": [], "output_file": None}
+
+    def _load(self):
+        if not os.path.exists(self.manifest_path):
+            return self._fresh()
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Unreadable checkpoint manifest, starting over: {str(e)}")
+            return self._fresh()
+        if manifest.get("job_id") != self.job_id or manifest.get("params") != self.params:
+            logger.warning(f"Checkpoint for job {self.job_id} was made with different parameters, starting over")
+            self._remove_segments(manifest.get("segments", []))
+            return self._fresh()
+        return manifest
+
+    def completed_output(self, output_dir):
+        """
+        Return the finished video path if this job already completed
+        """
+        output_file = self.manifest.get("output_file")
+        if output_file and os.path.exists(os.path.join(output_dir, output_file)):
+            return os.path.join(output_dir, output_file)
+        return None
+
+    def resume(self, on_segment=None):
+        """
+        Replay the verified segments in order and return (frame count, conditioning image)
+
+        Each segment's frames are passed to `on_segment` as soon as they are
+        verified, so only one segment is loaded at a time. Verification stops
+        at the first missing or corrupted segment, which is dropped along with
+        everything after it so it gets regenerated.
+        """
+        frame_count = 0
+        conditioning = None
+        good = []
+        for segment in self.manifest["segments"]:
+            path = os.path.join(self.directory, segment["file"])
+            try:
+                array = np.load(path)
+                if len(array) != segment["frames"] or _sha256(array) != segment["sha256"]:
+                    raise ValueError("checksum mismatch")
+                conditioning = Image.open(os.path.join(self.directory, segment["conditioning"]))
+                conditioning.load()
+            except (OSError, ValueError, EOFError) as e:
+                # A zero-byte or truncated segment makes np.load raise EOFError
+                logger.warning(f"Segment {segment['index']} of job {self.job_id} is corrupted ({str(e)}), regenerating from there")
+                break
+            if on_segment:
+                on_segment([Image.fromarray(frame) for frame in array])
+            frame_count += len(array)
+            good.append(segment)
+
+        if len(good) != len(self.manifest["segments"]):
+            self._remove_segments(self.manifest["segments"][len(good):])
+            self.manifest["segments"] = good
+            _atomic_write_json(self.manifest_path, self.manifest)
+        if good:
+            logger.info(f"Resuming job {self.job_id} after {len(good)} segment(s), {frame_count} frames")
+        return frame_count, conditioning
+
+    def save_segment(self, frames):
+        """
+        Persist a completed segment and the frame that conditions the next one
+        """
+        index = len(self.manifest["segments"])
+        array = np.stack([np.asarray(frame) for frame in frames])
+        segment_file = f"segment_{index:04d}.npy"
+        conditioning_file = f"segment_{index:04d}_conditioning.png"
+
+        # np.save appends ".npy" to names without it, so keep the suffix on the temp file
+        tmp_path = os.path.join(self.directory, f"segment_{index:04d}.tmp.npy")
+        np.save(tmp_path, array)
+        os.replace(tmp_path, os.path.join(self.directory, segment_file))
+        Image.fromarray(array[-1]).save(os.path.join(self.directory, conditioning_file))
+
+        self.manifest["segments"].append({
+            "index": index,
+            "file": segment_file,
+            "conditioning": conditioning_file,
+            "frames": len(array),
+            "sha256": _sha256(array)
+        })
+        _atomic_write_json(self.manifest_path, self.manifest)
+
+    def finish(self, output_file):
+        """
+        Record the finished video and drop the segment data
+        """
+        self._remove_segments(self.manifest["segments"])
+        self.manifest["segments"] = []
+        self.manifest["output_file"] = output_file
+        _atomic_write_json(self.manifest_path, self.manifest)
+        self.close()
+
+    def close(self):
+        """
+        Release the checkpoint lock
+        """
+        self.lock_file.close()
+
+    def _remove_segments(self, segments):
+        for segment in segments:
+            for name in (segment.get("file"), segment.get("conditioning")):
+                if name and os.path.exists(os.path.join(self.directory, name)):
+                    os.remove(os.path.join(self.directory, name))
+
+def open_checkpoint(job, style):
+    """
+    Attach a checkpoint to a job that has a job_id; returns None otherwise
+    """
+    if not job.get("job_id"):
+        return None
+    params = {
+        "style": style,
+        "prompt": job["prompt"],
+        "duration": job["duration"],
+        "resolution": job["resolution"],
+        "generation_resolution": job.get("generation_resolution"),
+        "interpolation_factor": job.get("interpolation_factor")  # Changes the keyframe count
+    }
+    directory = os.path.join(job["output_dir"], ".checkpoint", job["job_id"])
+    return JobCheckpoint(directory, job["job_id"], params)
+
+def generate_segmented(job, generate_segment, on_segment, segment_frames=SEGMENT_FRAMES):
+    """
+    Generate job["num_frames"] frames in segments, each conditioned on the
+    last frame of the previous one, checkpointing after every segment
+
+    `generate_segment(image, start_frame, count)` returns a list of frames.
+    Every segment, resumed ones included, is handed to `on_segment(frames)`
+    in order and then dropped, so a long job holds one segment at a time.
+    Returns the number of frames generated.
+    """
+    checkpoint = job.get("checkpoint")
+    done, image = 0, job.get("image")
+    if checkpoint:
+        done, resumed_image = checkpoint.resume(on_segment)
+        if resumed_image is not None:
+            image = resumed_image
+
+    while done < job["num_frames"]:
+        count = min(segment_frames, job["num_frames"] - done)
+        segment = generate_segment(image, done, count)[:count]
+        if not segment:
+            raise Exception("Model returned no frames")
+        if checkpoint:
+            checkpoint.save_segment(segment)
+        on_segment(segment)
+        done += len(segment)
+        image = segment[-1]
+        logger.info(f"Generated {done}/{job['num_frames']} frames")
+    return done
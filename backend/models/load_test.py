@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Load Test Harness
+Drives concurrent jobs through the generation scripts and chunk manager with
+a stub model and reports queue wait, latency, throughput and peak memory
+"""
+
+import argparse
+import json
+import logging
+import os
+import queue
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MODELS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+STYLE_SCRIPTS = {
+    "cinematic": "wan2_cinematic.py",
+    "educational": "wan2_educational.py",
+    "animation": "ltx2_animation.py",
+}
+
+PROMPTS = [
+    "the water cycle explained",
+    "a city skyline at sunset",
+    "how neural networks learn",
+    "a fox running through snow",
+    "the history of the printing press",
+    "a robot exploring mars",
+]
+
+PERCENTILES = (50, 95, 99)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Load test the generation scripts with a stub model')
+    parser.add_argument('--output_dir', type=str, required=True, help='Directory for job outputs and the report')
+    parser.add_argument('--jobs', type=int, default=20, help='Number of jobs to submit')
+    parser.add_argument('--arrival_rate', type=float, default=0.5, help='Mean job arrivals per second (Poisson; 0 = all at once)')
+    parser.add_argument('--concurrency', type=int, default=2, help='Jobs run at once, like the queue worker count')
+    parser.add_argument('--style_mix', type=str, default='cinematic=1,educational=1,animation=1',
+                        help='Relative weight of each style, e.g. "educational=3,cinematic=1"')
+    parser.add_argument('--duration', type=int, default=2, help='Video duration per job in seconds')
+    parser.add_argument('--resolution', type=str, default='720p', help='Resolution per job')
+    parser.add_argument('--stub_step_ms', type=float, default=2.0, help='Stub model CPU time per frame per inference step')
+    parser.add_argument('--no_postprocess', action='store_true', help='Skip running chunk_manager.py on each job')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for arrivals, styles and prompts')
+    parser.add_argument('--report', type=str, help='Report path (default: <output_dir>/load_test_report.json)')
+    parser.add_argument('--baseline', type=str, help='Earlier report to compare against')
+    return parser.parse_args()
+
+def parse_style_mix(spec):
+    """
+    Parse "style=weight,..." into normalized probabilities
+    """
+    weights = {}
+    for item in filter(None, spec.split(',')):
+        style, weight = item.split('=')
+        weights[style.strip()] = float(weight)
+    unknown = set(weights) - set(STYLE_SCRIPTS)
+    if unknown:
+        raise ValueError(f"Unknown styles in mix: {', '.join(sorted(unknown))}")
+    total = sum(weights.values())
+    return {style: weight / total for style, weight in weights.items() if weight > 0}
+
+def build_schedule(count, arrival_rate, style_mix, seed, run_id):
+    """
+    Deterministic list of jobs with their arrival offsets in seconds
+
+    Job IDs carry the run ID, so a run into an earlier run's output directory
+    gets fresh checkpoints and job directories instead of reusing its outputs.
+    """
+    rng = random.Random(seed)
+    styles, weights = zip(*sorted(style_mix.items()))
+    schedule, arrival = [], 0.0
+    for index in range(count):
+        if arrival_rate > 0 and index > 0:
+            arrival += rng.expovariate(arrival_rate)
+        schedule.append({
+            "index": index,
+            "job_id": f"load_{run_id}_{index:04d}",
+            "style": rng.choices(styles, weights)[0],
+            "prompt": rng.choice(PROMPTS),
+            "arrival": arrival,
+        })
+    return schedule
+
+def run_process(cmd, log_path):
+    """
+    Run a command to completion and return (exit code, seconds, peak RSS in MB)
+
+    The peak RSS comes from wait4, so it covers the process and the FFmpeg
+    children it waited for.
+    """
+    start = time.perf_counter()
+    with open(log_path, 'w') as log:
+        process = subprocess.Popen(cmd, cwd=MODELS_DIR, stdout=log, stderr=subprocess.STDOUT)
+        _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    return process.returncode, time.perf_counter() - start, usage.ru_maxrss / 1024
+
+def run_job(job, args):
+    """
+    Generate one job's video with the stub model, then post-process it
+    """
+    job_dir = os.path.join(args.output_dir, job["job_id"])
+    os.makedirs(job_dir, exist_ok=True)
+    catalog_db = os.path.join(args.output_dir, "catalog.db")
+
+    generate_cmd = [
+        sys.executable, STYLE_SCRIPTS[job["style"]],
+        '--prompt', job["prompt"],
+        '--duration', str(args.duration),
+        '--resolution', args.resolution,
+        '--output_dir', job_dir,
+        '--job_id', job["job_id"],
+        '--catalog_db', catalog_db,
+        '--stub_model', '--stub_step_ms', str(args.stub_step_ms),
+    ]
+    code, job["generate_seconds"], job["peak_rss_mb"] = run_process(generate_cmd, os.path.join(job_dir, "generate.log"))
+    if code != 0:
+        job["error"] = f"{STYLE_SCRIPTS[job['style']]} exited with code {code}"
+        return
+
+    if args.no_postprocess:
+        return
+    postprocess_cmd = [
+        sys.executable, 'chunk_manager.py',
+        '--input_dir', job_dir,
+        '--output_path', os.path.join(args.output_dir, f"{job['job_id']}_final.mp4"),
+        '--resolution', args.resolution,
+        '--job_id', job["job_id"],
+        '--catalog_db', catalog_db,
+    ]
+    code, job["postprocess_seconds"], rss = run_process(postprocess_cmd, os.path.join(job_dir, "postprocess.log"))
+    job["peak_rss_mb"] = max(job["peak_rss_mb"], rss)
+    if code != 0:
+        job["error"] = f"chunk_manager.py exited with code {code}"
+
+def run_load_test(schedule, args):
+    """
+    Submit jobs at their arrival times to `args.concurrency` workers and time them
+    """
+    pending = queue.Queue()
+    start = time.perf_counter()
+
+    def worker():
+        while True:
+            job = pending.get()
+            if job is None:
+                break
+            job["started"] = time.perf_counter() - start
+            try:
+                run_job(job, args)
+            except Exception as e:
+                logger.error(f"Job {job['job_id']} failed: {str(e)}")
+                job["error"] = str(e)
+            job["finished"] = time.perf_counter() - start
+            job["queue_wait"] = job["started"] - job["submitted"]
+            job["latency"] = job["finished"] - job["submitted"]
+            status = "failed" if job["error"] else "done"
+            logger.info(f"Job {job['job_id']} ({job['style']}) {status} in {job['latency']:.2f}s")
+
+    workers = [threading.Thread(target=worker, name=f"load-worker-{i}", daemon=True)
+               for i in range(args.concurrency)]
+    for thread in workers:
+        thread.start()
+
+    for job in schedule:
+        delay = job["arrival"] - (time.perf_counter() - start)
+        if delay > 0:
+            time.sleep(delay)
+        job["error"] = None
+        job["submitted"] = time.perf_counter() - start
+        pending.put(job)
+    for _ in workers:
+        pending.put(None)
+    for thread in workers:
+        thread.join()
+    return time.perf_counter() - start
+
+def summarize(values):
+    """
+    Percentiles and max of a list of numbers, or None when it's empty
+    """
+    if not values:
+        return None
+    summary = {f"p{p}": round(float(np.percentile(values, p)), 3) for p in PERCENTILES}
+    summary["max"] = round(max(values), 3)
+    return summary
+
+def job_stats(jobs, wall_seconds):
+    """
+    Latency, queue wait, stage time and memory statistics for a set of jobs
+    """
+    succeeded = [job for job in jobs if job["error"] is None]
+    return {
+        "jobs": len(jobs),
+        "failed": len(jobs) - len(succeeded),
+        "throughput_jobs_per_min": round(60 * len(succeeded) / wall_seconds, 3) if wall_seconds else 0,
+        "latency_seconds": summarize([job["latency"] for job in succeeded]),
+        "queue_wait_seconds": summarize([job["queue_wait"] for job in jobs]),
+        "generate_seconds": summarize([job["generate_seconds"] for job in succeeded]),
+        "postprocess_seconds": summarize([job["postprocess_seconds"] for job in succeeded if "postprocess_seconds" in job]),
+        "peak_rss_mb": summarize([job["peak_rss_mb"] for job in jobs if "peak_rss_mb" in job]),
+    }
+
+def build_report(schedule, wall_seconds, args):
+    config = {key: getattr(args, key) for key in
+              ("jobs", "arrival_rate", "concurrency", "style_mix", "duration", "resolution",
+               "stub_step_ms", "no_postprocess", "seed")}
+    config["cpu_count"] = os.cpu_count()
+    config["run_id"] = args.run_id
+    by_style = {}
+    for style in sorted({job["style"] for job in schedule}):
+        by_style[style] = job_stats([job for job in schedule if job["style"] == style], wall_seconds)
+    return {
+        "created_at": datetime.utcnow().isoformat(),
+        "config": config,
+        "wall_seconds": round(wall_seconds, 3),
+        "overall": job_stats(schedule, wall_seconds),
+        "by_style": by_style,
+        "jobs": schedule,
+    }
+
+def compare_reports(current, baseline):
+    """
+    Lines comparing the overall metrics of two reports
+    """
+    lines = []
+    now, before = current["overall"], baseline["overall"]
+    metric = "throughput_jobs_per_min"
+    lines.append(f"  {metric}: {before[metric]} -> {now[metric]}")
+    for metric in ("latency_seconds", "queue_wait_seconds", "generate_seconds", "postprocess_seconds", "peak_rss_mb"):
+        if not now.get(metric) or not before.get(metric):
+            continue
+        for p in ("p50", "p95", "p99"):
+            old, new = before[metric][p], now[metric][p]
+            change = f"{100 * (new - old) / old:+.1f}%" if old else "n/a"
+            lines.append(f"  {metric} {p}: {old} -> {new} ({change})")
+    return lines
+
+def print_stats(label, stats):
+    print(f"  {label}: {stats['jobs']} jobs, {stats['failed']} failed, "
+          f"{stats['throughput_jobs_per_min']} jobs/min")
+    for metric in ("latency_seconds", "queue_wait_seconds", "generate_seconds", "postprocess_seconds", "peak_rss_mb"):
+        if stats[metric]:
+            values = ", ".join(f"{key} {value}" for key, value in stats[metric].items())
+            print(f"    {metric}: {values}")
+
+def main():
+    args = parse_args()
+    os.makedirs(args.output_dir, exist_ok=True)
+    args.output_dir = os.path.abspath(args.output_dir)
+
+    args.run_id = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+    schedule = build_schedule(args.jobs, args.arrival_rate, parse_style_mix(args.style_mix), args.seed, args.run_id)
+    logger.info(f"Load testing {args.jobs} job(s) at {args.arrival_rate} arrivals/s with {args.concurrency} worker(s)")
+
+    wall_seconds = run_load_test(schedule, args)
+    report = build_report(schedule, wall_seconds, args)
+
+    report_path = args.report or os.path.join(args.output_dir, "load_test_report.json")
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print("LOAD_TEST:")
+    print_stats("overall", report["overall"])
+    for style, stats in report["by_style"].items():
+        print_stats(style, stats)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print("COMPARISON:")
+        for line in compare_reports(report, baseline):
+            print(line)
+    print(f"REPORT: {report_path}")
+    sys.exit(1 if report["overall"]["failed"] else 0)
+
+if __name__ == "__main__":
+    main()
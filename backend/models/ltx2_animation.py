@@ -15,18 +15,34 @@ import logging
 import json
 from datetime import datetime
 
+from frame_interpolation import add_interpolation_args, keyframe_count, resolve_interpolation
+from job_checkpoint import generate_segmented, open_checkpoint
+from output_catalog import add_catalog_args, catalog_path, record_output
+from pipeline import Pipeline, Stage, add_pipeline_args, load_jobs, parse_stage_workers, report_jobs
+from stub_model import StubAnimationModel, add_stub_model_args
+from video_writer import VideoStream
+from worker_pool import WorkerPool, add_worker_pool_args
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def parse_args():
     parser = argparse.ArgumentParser(description='Generate animated videos using LTX-2 model')
-    parser.add_argument('--prompt', type=str, required=True, help='Text prompt for video generation')
+    parser.add_argument('--prompt', type=str, help='Text prompt for video generation')
     parser.add_argument('--duration', type=int, default=300, help='Duration in seconds')
     parser.add_argument('--resolution', type=str, default='1080p', help='Resolution (e.g., 720p, 1080p)')
     parser.add_argument('--output_dir', type=str, required=True, help='Output directory')
     parser.add_argument('--gpu', type=bool, default=True, help='Use GPU acceleration')
-    return parser.parse_args()
+    add_interpolation_args(parser)
+    add_pipeline_args(parser)
+    add_catalog_args(parser)
+    add_stub_model_args(parser)
+    add_worker_pool_args(parser)
+    args = parser.parse_args()
+    if not args.prompt and not args.jobs_file:
+        parser.error('--prompt or --jobs_file is required')
+    return args
 
 def load_ltx2_model(model_path=None):
     """
@@ -46,9 +62,10 @@ def load_ltx2_model(model_path=None):
             def __init__(self):
                 self.device = device
                 
-            def generate(self, prompt, num_frames, height, width):                # Simulate video generation
+            def generate(self, prompt, num_frames, height, width, start_frame=0):
+                # Simulate video generation
                 frames = []
-                for i in range(num_frames):
+                for i in range(start_frame, start_frame + num_frames):
                     # Create animated frame based on prompt
                     frame = self.create_animated_frame(prompt, i, height, width)
                     frames.append(frame)
@@ -88,96 +105,151 @@ def preprocess_animation_prompt(prompt):
     enhanced_prompt = f"{prompt}, " + ", ".join(animation_keywords)
     return enhanced_prompt
 
-def generate_animation_frames(model, prompt, num_frames, height, width):
+def generate_animation_frames(model, prompt, num_frames, height, width, start_frame=0):
     """
     Generate animation frames using LTX-2 model
     """
     try:
         logger.info(f"Generating {num_frames} animation frames...")
-        frames = model.generate(prompt, num_frames, height, width)
-        logger.info("Frame generation completed")        return frames
+        frames = model.generate(prompt, num_frames, height, width, start_frame)
+        logger.info("Frame generation completed")
+        return frames
     except Exception as e:
         logger.error(f"Error generating animation frames: {str(e)}")
         raise
 
-def save_animation_video(frames, output_path, fps=12):
+def prepare_animation_job(job):
     """
-    Save animation frames to video file using Pillow
-    In production, this would use FFmpeg
+    Pipeline stage: enhance the prompt and work out the frame geometry
     """
-    try:
-        # Save first frame as reference
-        frames[0].save(
-            output_path,
-            save_all=True,
-            append_images=frames[1:],
-            duration=1000//fps,  # Duration in milliseconds per frame
-            loop=0
-        )
-        logger.info(f"Animation video saved to {output_path}")
-    except Exception as e:
-        logger.error(f"Error saving animation video: {str(e)}")
-        raise
+    logger.info(f"Preparing job {job['index']}: '{job['prompt']}' ({job['duration']}s, {job['resolution']})")
+    job["checkpoint"] = open_checkpoint(job, "animation")
+    completed = job["checkpoint"].completed_output(job["output_dir"]) if job["checkpoint"] else None
+    if completed:
+        # Finished on an earlier launch; nothing left to generate
+        job["checkpoint"].close()
+        job["output_path"] = completed
+        job["done"] = True
+        return job
+    
+    job["enhanced_prompt"] = preprocess_animation_prompt(job["prompt"])
+    logger.info(f"Enhanced prompt: {job['enhanced_prompt']}")
+    
+    # Determine resolution
+    job["width"], job["height"] = (1920, 1080) if job["resolution"] == "1080p" else (1280, 720)
+    
+    # The model generates keyframes; interpolation fills in the output frame rate
+    job["fps"] = job["keyframe_fps"] * job["interpolation_factor"]
+    job["num_frames"] = keyframe_count(job["duration"], job["keyframe_fps"], job["interpolation_factor"])
+    return job
+
+def open_animation_stream(job):
+    """
+    Name the output file and open the encoder the generated segments stream into
+    """
+    # Create output directory if it doesn't exist
+    os.makedirs(job["output_dir"], exist_ok=True)
+    
+    # Generate output filename
+    # A stable job ID gives retries the same output name
+    suffix = job["job_id"] or int(os.urandom(4).hex(), 16)
+    output_filename = f"animation_{job['prompt'].replace(' ', '_')[:50]}_{suffix}.mp4"
+    return VideoStream(os.path.join(job["output_dir"], output_filename), job)
+
+def encode_animation_job(job):
+    """
+    Pipeline stage: finish encoding the streamed frames and write the metadata file
+    """
+    stream = job["stream"]
+    output_path = stream.output_path
+    output_filename = os.path.basename(output_path)
+    
+    logger.info("Saving animation video...")
+    stream.close()
+    
+    # Create metadata
+    metadata = {
+        "model_used": "LTX-2 Animation",
+        "style": "animation",
+        "job_id": job["job_id"],
+        "prompt": job["prompt"],
+        "duration": job["duration"],
+        "resolution": job["resolution"],
+        "fps": job["fps"],
+        "keyframe_fps": job["keyframe_fps"],
+        "interpolation": job["interpolation"],
+        "interpolation_factor": job["interpolation_factor"],
+        "frame_count": int(job["duration"] * job["fps"]),
+        "output_file": output_filename,
+        "generated_at": datetime.utcnow().isoformat()
+    }
+    
+    metadata_path = output_path.replace('.mp4', '_metadata.json')
+    with open(metadata_path, 'w') as f:
+        json.dump(metadata, f, indent=2)
+    record_output(job["catalog_db"], "video", output_path, metadata, style="animation",
+                  job_id=job["job_id"], metadata_path=metadata_path)
+    
+    logger.info(f"Output: {output_path}")
+    logger.info(f"Metadata: {metadata_path}")
+    
+    job["output_path"] = output_path
+    if job["checkpoint"]:
+        job["checkpoint"].finish(output_filename)
+    job["stream"] = None
+    return job
 
 def main():
     args = parse_args()
     
-    logger.info(f"Starting animation video generation with prompt: '{args.prompt}'")
-    logger.info(f"Duration: {args.duration}s, Resolution: {args.resolution}")
-    
     try:
-        # Load model
-        logger.info("Loading LTX-2 animation model...")
-        model = load_ltx2_model()
-        
-        # Preprocess prompt
-        enhanced_prompt = preprocess_animation_prompt(args.prompt)
-        logger.info(f"Enhanced prompt: {enhanced_prompt}")
-        
-        # Determine resolution
-        width, height = (1920, 1080) if args.resolution == "1080p" else (1280, 720)
-        
-        # Calculate number of frames based on duration
-        fps = 12  # Higher FPS for smoother animation
-        num_frames = int(args.duration * fps)
-        logger.info(f"Generating {num_frames} frames at {fps}fps")
+        jobs = load_jobs(args)
+        for job in jobs:
+            job.update(catalog_db=catalog_path(args.catalog_db),
+                       **resolve_interpolation(args, "animation"))
+        logger.info(f"Starting animation video generation for {len(jobs)} job(s)")
         
-        # Generate animation frames
-        logger.info("Generating animation frames...")
-        frames = generate_animation_frames(model, enhanced_prompt, num_frames, height, width)        
-        # Create output directory if it doesn't exist
-        os.makedirs(args.output_dir, exist_ok=True)
+        # Validate the stage layout before spending time on the model
+        workers = parse_stage_workers(args.stage_workers)
         
-        # Generate output filename
-        output_filename = f"animation_{args.prompt.replace(' ', '_')[:50]}_{int(os.urandom(4).hex(), 16)}.mp4"
-        output_path = os.path.join(args.output_dir, output_filename)
-        
-        # Save video
-        logger.info("Saving animation video...")
-        save_animation_video(frames, output_path, fps)
+        # Load model
+        logger.info("Loading LTX-2 animation model...")
+        model = StubAnimationModel(args.stub_step_ms) if args.stub_model else load_ltx2_model()
         
-        # Create metadata
-        metadata = {
-            "model_used": "LTX-2 Animation",
-            "prompt": args.prompt,
-            "duration": args.duration,
-            "resolution": args.resolution,
-            "fps": fps,
-            "frame_count": len(frames),
-            "output_file": output_filename,
-            "generated_at": datetime.utcnow().isoformat()
-        }
+        def generate_job(job):
+            logger.info(f"Generating {job['num_frames']} keyframes at {job['keyframe_fps']}fps")
+            # Each segment is interpolated and piped to the encoder as soon as it exists
+            stream = open_animation_stream(job)
+            try:
+                generate_segmented(
+                    job, lambda image, start, count: generate_animation_frames(
+                        model, job["enhanced_prompt"], count, job["height"], job["width"], start
+                    ),
+                    stream.write_segment
+                )
+            except Exception:
+                stream.abort()
+                raise
+            job["stream"] = stream
+            return job
         
-        metadata_path = output_path.replace('.mp4', '_metadata.json')
-        with open(metadata_path, 'w') as f:
-            json.dump(metadata, f, indent=2)
+        stages = [
+            Stage("prepare", prepare_animation_job, workers.get("prepare", 1)),
+            Stage("generate", generate_job, workers.get("generate", 1)),
+            Stage("encode", encode_animation_job, workers.get("encode", 1)),
+        ]
+        if args.workers > 1:
+            # Forked workers share the loaded weights copy-on-write
+            runner = WorkerPool(stages, args.workers, args.threads_per_worker,
+                                args.job_memory_mb, args.memory_reserve_mb)
+        else:
+            runner = Pipeline(stages, args.queue_depth)
+        jobs = runner.run(jobs)
         
-        logger.info(f"Animation generation completed successfully!")
-        logger.info(f"Output: {output_path}")
-        logger.info(f"Metadata: {metadata_path}")
+        logger.info(f"Animation generation completed!")
         
         # Print completion message for parent process
-        print(f"SUCCESS: Animation generated at {output_path}")
+        sys.exit(report_jobs(jobs, "Animation"))
         
     except Exception as e:
         logger.error(f"Animation generation failed: {str(e)}")
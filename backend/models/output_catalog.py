@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Output Catalog
+Indexed, append-only record of every generated and post-processed video in SQLite
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+from datetime import datetime
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outputs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT,
+    kind TEXT NOT NULL,
+    style TEXT,
+    prompt TEXT,
+    prompt_hash TEXT,
+    resolution TEXT,
+    duration REAL,
+    output_path TEXT NOT NULL,
+    metadata_path TEXT,
+    thumbnail_path TEXT,
+    metadata TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_outputs_prompt_hash ON outputs (prompt_hash, created_at);
+CREATE INDEX IF NOT EXISTS idx_outputs_style ON outputs (style, created_at);
+CREATE INDEX IF NOT EXISTS idx_outputs_resolution ON outputs (resolution, created_at);
+CREATE INDEX IF NOT EXISTS idx_outputs_created_at ON outputs (created_at);
+CREATE INDEX IF NOT EXISTS idx_outputs_job_id ON outputs (job_id);
+"""
+
+DEFAULT_CATALOG_DB = os.path.join(os.path.expanduser("~"), ".local", "share", "ghost_creators", "catalog.db")
+
+COLUMNS = ("id", "job_id", "kind", "style", "prompt", "prompt_hash", "resolution", "duration",
+           "output_path", "metadata_path", "thumbnail_path", "metadata", "created_at")
+
+def prompt_hash(prompt):
+    """
+    Hash of a prompt with case and whitespace normalized
+    """
+    normalized = " ".join(prompt.lower().split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+def catalog_path(catalog_db=None):
+    """
+    Resolve the catalog location: --catalog_db, then $OUTPUT_CATALOG_DB, then one shared default
+
+    The default doesn't depend on the output directory, so separate jobs land in the same catalog.
+    """
+    return catalog_db or os.environ.get("OUTPUT_CATALOG_DB") or DEFAULT_CATALOG_DB
+
+class OutputCatalog:
+    """
+    Catalog of finished outputs shared by the generators and chunk manager
+
+    Rows are only ever inserted. Each writer opens its own connection (forked
+    pool workers included), and WAL mode lets readers query while another
+    process is writing.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def record(self, kind, output_path, metadata, style=None, job_id=None,
+               metadata_path=None, thumbnail_path=None):
+        """
+        Append one output in a single transaction and return its row ID
+
+        A job retried after recording its output but before finishing its
+        checkpoint records it again; that returns the existing row instead.
+        """
+        prompt = metadata.get("prompt")
+        with self.conn:
+            if job_id is not None:
+                row = self.conn.execute(
+                    "SELECT id FROM outputs WHERE job_id = ? AND kind = ? AND output_path = ?",
+                    (job_id, kind, os.path.abspath(output_path))
+                ).fetchone()
+                if row:
+                    logger.info(f"{kind.capitalize()} output {output_path} is already cataloged")
+                    return row[0]
+            cursor = self.conn.execute(
+                """
+                INSERT INTO outputs (job_id, kind, style, prompt, prompt_hash, resolution, duration,
+                                     output_path, metadata_path, thumbnail_path, metadata, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (job_id, kind, style, prompt, prompt_hash(prompt) if prompt else None,
+                 metadata.get("resolution"), metadata.get("duration"),
+                 os.path.abspath(output_path),
+                 os.path.abspath(metadata_path) if metadata_path else None,
+                 os.path.abspath(thumbnail_path) if thumbnail_path else None,
+                 json.dumps(metadata), datetime.utcnow().isoformat())
+            )
+        logger.info(f"Cataloged {kind} output {output_path}")
+        return cursor.lastrowid
+
+    def find(self, prompt=None, style=None, resolution=None, job_id=None, kind=None,
+             since=None, until=None, limit=20):
+        """
+        Return matching outputs, newest first, as dicts
+        """
+        clauses, params = [], []
+        for column, value in (("prompt_hash", prompt_hash(prompt) if prompt else None),
+                              ("style", style), ("resolution", resolution),
+                              ("job_id", job_id), ("kind", kind)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if until:
+            clauses.append("created_at < ?")
+            params.append(until)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self.conn.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM outputs {where} ORDER BY created_at DESC LIMIT ?",
+            params + [limit]
+        ).fetchall()
+
+        results = []
+        for row in rows:
+            entry = dict(zip(COLUMNS, row))
+            entry["metadata"] = json.loads(entry["metadata"])
+            results.append(entry)
+        return results
+
+def record_output(db_path, kind, output_path, metadata, **kwargs):
+    """
+    Open the catalog, append one output and close it again
+    """
+    catalog = OutputCatalog(db_path)
+    try:
+        return catalog.record(kind, output_path, metadata, **kwargs)
+    finally:
+        catalog.close()
+
+def add_catalog_args(parser):
+    """
+    Add the output catalog option
+    """
+    parser.add_argument('--catalog_db', type=str,
+                        help=f'Output catalog database (default: $OUTPUT_CATALOG_DB or {DEFAULT_CATALOG_DB})')
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Query the catalog of generated videos')
+    add_catalog_args(parser)
+    parser.add_argument('--prompt', type=str, help='Prompt text (matched on its normalized hash)')
+    parser.add_argument('--style', type=str, help='Style (cinematic, educational, animation)')
+    parser.add_argument('--resolution', type=str, help='Resolution (e.g., 720p, 1080p)')
+    parser.add_argument('--job_id', type=str, help='Job ID')
+    parser.add_argument('--kind', type=str, choices=['video', 'stitched'], help='Generated video or chunk manager output')
+    parser.add_argument('--since', type=str, help='Created at or after this ISO timestamp')
+    parser.add_argument('--until', type=str, help='Created before this ISO timestamp')
+    parser.add_argument('--limit', type=int, default=20, help='Maximum results')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    catalog = OutputCatalog(catalog_path(args.catalog_db))
+    try:
+        results = catalog.find(prompt=args.prompt, style=args.style, resolution=args.resolution,
+                               job_id=args.job_id, kind=args.kind, since=args.since,
+                               until=args.until, limit=args.limit)
+    finally:
+        catalog.close()
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
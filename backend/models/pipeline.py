@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Generation Job Pipeline
+Runs video generation jobs through overlapped stages connected by bounded queues
+"""
+
+import json
+import logging
+import queue
+import threading
+import time
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_DONE = object()  # Sentinel passed down the queues once all jobs are submitted
+
+SHARED_MODEL_STAGES = ("generate",)  # Stages that call the one loaded model
+
+class Stage:
+    """
+    One step of the pipeline, run by `workers` threads
+
+    `fn` receives the job dict, adds its outputs to it and returns it.
+    """
+
+    def __init__(self, name, fn, workers=1):
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+
+class Pipeline:
+    """
+    Chain of stages where job N+1 can be prepared while job N is generated
+    and job N-1 is encoded
+
+    Each pair of stages is connected by a queue holding at most `queue_depth`
+    jobs, so a fast stage blocks instead of piling up frames in memory.
+    """
+
+    def __init__(self, stages, queue_depth=1):
+        self.stages = stages
+        self.queue_depth = queue_depth
+
+    def run(self, jobs):
+        """
+        Run all jobs through every stage and return them in submission order
+        """
+        queues = [queue.Queue(maxsize=self.queue_depth) for _ in self.stages]
+        results = queue.Queue()
+        queues.append(results)
+
+        threads = []
+        for i, stage in enumerate(self.stages):
+            remaining = [stage.workers]  # Workers of this stage still running
+            lock = threading.Lock()
+            for _ in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._worker,
+                    args=(stage, queues[i], queues[i + 1], remaining, lock),
+                    name=f"{stage.name}-worker",
+                    daemon=True
+                )
+                thread.start()
+                threads.append(thread)
+
+        for index, job in enumerate(jobs):
+            job.setdefault("index", index)
+            job.setdefault("error", None)
+            job.setdefault("timings", {})
+            queues[0].put(job)
+        for _ in range(self.stages[0].workers):
+            queues[0].put(_DONE)
+
+        for thread in threads:
+            thread.join()
+
+        finished = []
+        while True:
+            job = results.get()
+            if job is _DONE:
+                break
+            finished.append(job)
+        return sorted(finished, key=lambda job: job["index"])
+
+    def _worker(self, stage, inbox, outbox, remaining, lock):
+        while True:
+            job = inbox.get()
+            if job is _DONE:
+                break
+
+            # Failed and already-finished jobs pass through untouched so later stages skip them
+            if job["error"] is None and not job.get("done"):
+                start = time.perf_counter()
+                try:
+                    job = stage.fn(job)
+                except Exception as e:
+                    logger.error(f"Stage '{stage.name}' failed for job {job['index']}: {str(e)}")
+                    job["error"] = str(e)
+                job["timings"][stage.name] = time.perf_counter() - start
+            outbox.put(job)
+
+        # The last worker of a stage tells every worker of the next stage to stop
+        with lock:
+            remaining[0] -= 1
+            if remaining[0] == 0:
+                next_workers = self._next_workers(stage)
+                for _ in range(next_workers):
+                    outbox.put(_DONE)
+
+    def _next_workers(self, stage):
+        index = self.stages.index(stage)
+        if index + 1 < len(self.stages):
+            return self.stages[index + 1].workers
+        return 1  # The results queue has a single reader
+
+def add_pipeline_args(parser):
+    """
+    Add the job batch and stage concurrency options shared by the model scripts
+    """
+    parser.add_argument('--jobs_file', type=str, help='JSON list of jobs ({"prompt", "duration", "resolution", "job_id"}) to run with one loaded model')
+    parser.add_argument('--job_id', type=str, help='Stable job ID; re-launching with the same ID resumes from its checkpoint')
+    parser.add_argument('--queue_depth', type=int, default=1, help='Jobs buffered between pipeline stages')
+    parser.add_argument('--stage_workers', type=str, default='', help='Worker threads per stage, e.g. "prepare=2,encode=2" (generate is always 1)')
+
+def parse_stage_workers(spec):
+    """
+    Parse "stage=count,..." into a dict
+
+    Stages that call the loaded model are limited to one worker: a diffusers
+    pipeline keeps its scheduler state on the instance, so two threads
+    denoising with it at once corrupt each other's timesteps.
+    """
+    workers = {}
+    for item in filter(None, spec.split(',')):
+        name, count = item.split('=')
+        workers[name.strip()] = int(count)
+    for name in SHARED_MODEL_STAGES:
+        if workers.get(name, 1) != 1:
+            raise ValueError(f"Stage '{name}' shares one model and must have exactly 1 worker; "
+                             f"use --workers for parallel generation")
+    return workers
+
+def load_jobs(args):
+    """
+    Build the job list from --jobs_file, or a single job from the CLI arguments
+    """
+    if args.jobs_file:
+        with open(args.jobs_file) as f:
+            specs = json.load(f)
+    else:
+        specs = [{"prompt": args.prompt, "job_id": args.job_id}]
+
+    jobs = []
+    for spec in specs:
+        jobs.append({
+            "prompt": spec["prompt"],
+            "duration": spec.get("duration", args.duration),
+            "resolution": spec.get("resolution", args.resolution),
+            "output_dir": spec.get("output_dir", args.output_dir),
+            "job_id": spec.get("job_id"),
+        })
+    return jobs
+
+def report_jobs(jobs, label):
+    """
+    Print a completion line per job for the parent process and return the exit code
+    """
+    failed = 0
+    for job in jobs:
+        if job["error"] is None:
+            print(f"SUCCESS: {label} generated at {job['output_path']}")
+        else:
+            failed += 1
+            print(f"ERROR: {job['error']}")
+    return 1 if failed else 0
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Stub Generation Models
+Deterministic CPU stand-ins for the SVD pipeline and the LTX-2 model, used
+to load test the generation scripts offline
+"""
+
+import hashlib
+import time
+
+import numpy as np
+from PIL import Image
+
+def simulate_compute(seconds):
+    """
+    Keep one core busy for `seconds`, like a CPU-bound denoising loop
+    """
+    deadline = time.perf_counter() + seconds
+    block = np.ones((64, 64), dtype=np.float32)
+    while time.perf_counter() < deadline:
+        block = np.tanh(block @ block.T * 1e-3)
+
+def _seed(*parts):
+    return int.from_bytes(hashlib.sha256(repr(parts).encode()).digest()[:4], "little")
+
+class StubVideoOutput:
+    def __init__(self, frames):
+        self.frames = [frames]
+
+class StubVideoPipeline:
+    """
+    Drop-in for StableVideoDiffusionPipeline's call signature
+
+    Frames are the conditioning image resized to the requested size and
+    panned by an amount that grows with `motion_bucket_id`, so the same
+    inputs always give the same frames. Each call spends `step_ms` of CPU
+    time per frame per inference step.
+    """
+
+    def __init__(self, step_ms=2.0):
+        self.step_ms = step_ms
+
+    def __call__(self, image, num_frames=14, height=576, width=1024, num_inference_steps=25,
+                 motion_bucket_id=127, **kwargs):
+        simulate_compute(num_frames * num_inference_steps * self.step_ms / 1000)
+        base = np.asarray(image.convert("RGB").resize((width, height)))
+        frames = []
+        for i in range(num_frames):
+            shift = (i * motion_bucket_id) // 255  # Pixels panned by frame i
+            frames.append(Image.fromarray(np.roll(base, shift, axis=1)))
+        return StubVideoOutput(frames)
+
+class StubAnimationModel:
+    """
+    Drop-in for the LTX-2 model's generate() with a vectorized animated pattern
+    """
+
+    def __init__(self, step_ms=2.0, steps=25):
+        self.step_ms = step_ms
+        self.steps = steps
+
+    def generate(self, prompt, num_frames, height, width, start_frame=0):
+        simulate_compute(num_frames * self.steps * self.step_ms / 1000)
+        rng = np.random.RandomState(_seed(prompt))
+        color = rng.randint(0, 256, 3)
+        y, x = np.mgrid[0:height, 0:width]
+        frames = []
+        for i in range(start_frame, start_frame + num_frames):
+            frame = np.empty((height, width, 3), dtype=np.uint8)
+            frame[..., 0] = (x + i * 5 + color[0]) % 255
+            frame[..., 1] = (y + i + color[1]) % 255
+            frame[..., 2] = (x + y + i + color[2]) % 255
+            frames.append(Image.fromarray(frame))
+        return frames
+
+def add_stub_model_args(parser):
+    """
+    Add the options that swap the model for a deterministic stub
+    """
+    parser.add_argument('--stub_model', action='store_true',
+                        help='Use a deterministic CPU stub instead of the model (load testing)')
+    parser.add_argument('--stub_step_ms', type=float, default=2.0,
+                        help='CPU time the stub spends per frame per inference step')
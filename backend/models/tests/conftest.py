@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The model scripts are flat modules that import each other by name
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
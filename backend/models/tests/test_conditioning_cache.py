@@ -0,0 +1,31 @@
+import os
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from conditioning_cache import ConditioningCache
+
+def test_disk_tier_stays_under_its_size_cap(tmp_path):
+    cache = ConditioningCache("model", str(tmp_path), max_entries=1, max_disk_mb=2)
+    for i in range(10):
+        cache.get_or_compute(cache.key("clip", i), lambda: torch.zeros(100_000), "cpu")
+
+    files = [entry for entry in os.scandir(tmp_path) if entry.name.endswith(".pt")]
+    assert sum(entry.stat().st_size for entry in files) <= 2 * 1024 * 1024
+    assert os.path.exists(tmp_path / f"{cache.key('clip', 9)}.pt")  # The newest entry survives
+    assert not os.path.exists(tmp_path / f"{cache.key('clip', 0)}.pt")
+
+def test_disk_hit_is_kept_over_older_entries(tmp_path):
+    cache = ConditioningCache("model", str(tmp_path), max_entries=1, max_disk_mb=1)
+    path = lambda name: tmp_path / f"{cache.key('clip', name)}.pt"
+    for age, name in enumerate(("a", "b")):
+        cache.get_or_compute(cache.key("clip", name), lambda: torch.zeros(100_000), "cpu")
+        os.utime(path(name), (age, age))
+
+    cache.entries.clear()
+    cache.get_or_compute(cache.key("clip", "a"), lambda: pytest.fail("expected a disk hit"), "cpu")
+    cache.get_or_compute(cache.key("clip", "c"), lambda: torch.zeros(100_000), "cpu")
+
+    assert os.path.exists(path("a")) and os.path.exists(path("c"))
+    assert not os.path.exists(path("b"))
@@ -0,0 +1,53 @@
+import shutil
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from frame_dedupe import MAX_HOLD_SECONDS, VFRWriter, merge_duplicate_frames
+
+def solid(value):
+    return Image.fromarray(np.full((36, 64, 3), value, dtype=np.uint8))
+
+def test_runs_of_identical_frames_merge_into_durations():
+    frames = [solid(0)] * 3 + [solid(100)] * 2 + [solid(200)]
+    kept, durations = merge_duplicate_frames(frames, fps=30)
+    assert [np.asarray(frame)[0, 0, 0] for frame in kept] == [0, 100, 200]
+    assert durations == [3, 2, 1]
+    assert sum(durations) == len(frames)
+
+def test_small_drift_adds_up_against_the_last_kept_frame():
+    # Each step is below the threshold, but the third frame is 4 away from the first
+    kept, durations = merge_duplicate_frames([solid(0), solid(2), solid(4)], fps=30, threshold=3.0)
+    assert durations == [2, 1]
+
+def test_local_change_is_kept():
+    changed = np.full((36, 64, 3), 50, dtype=np.uint8)
+    changed[:4, :4] = 90  # One thumbnail cell
+    kept, durations = merge_duplicate_frames([solid(50), Image.fromarray(changed)], fps=30)
+    assert durations == [1, 1]
+
+def test_hold_is_capped():
+    fps = 10
+    frames = [solid(0)] * 45
+    kept, durations = merge_duplicate_frames(frames, fps)
+    max_hold = int(MAX_HOLD_SECONDS * fps)
+    assert durations == [max_hold, max_hold, 45 - 2 * max_hold]
+
+def test_zero_threshold_keeps_every_frame():
+    frames = [solid(0)] * 4
+    kept, durations = merge_duplicate_frames(frames, fps=30, threshold=0)
+    assert len(kept) == 4 and durations == [1, 1, 1, 1]
+
+@pytest.mark.skipif(not shutil.which("ffmpeg"), reason="needs ffmpeg")
+def test_vfr_writer_keeps_the_full_duration(tmp_path):
+    output_path = str(tmp_path / "out.mp4")
+    writer = VFRWriter(output_path, fps=30)
+    frames = np.stack([np.asarray(solid(value)) for value in [0] * 40 + [120] * 20])
+    writer.write(frames[:25])
+    writer.write(frames[25:])
+    writer.close()
+
+    assert writer.durations == [40, 20]
+    assert (tmp_path / "out.mp4").stat().st_size > 0
+    assert [path.name for path in tmp_path.iterdir()] == ["out.mp4"]  # Scratch frames removed
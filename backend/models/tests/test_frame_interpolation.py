@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from frame_interpolation import (STYLE_INTERPOLATION, KeyframeInterpolator, blend_interpolate,
+                                 keyframe_count)
+
+def ramp(count, start=0):
+    # Keyframes whose pixels all equal their index * 8, so blends are easy to predict
+    return np.stack([np.full((2, 3, 3), (start + i) * 8, dtype=np.uint8) for i in range(count)])
+
+@pytest.mark.parametrize("style", sorted(STYLE_INTERPOLATION))
+def test_keyframes_cover_the_duration_after_interpolation(style):
+    settings = STYLE_INTERPOLATION[style]
+    fps = settings["keyframe_fps"] * settings["factor"]
+    for duration in (1, 2, 300):
+        count = keyframe_count(duration, settings["keyframe_fps"], settings["factor"])
+        assert (count - 1) * settings["factor"] + 1 >= duration * fps
+
+def test_keyframe_count_without_interpolation():
+    assert keyframe_count(10, 6, 1) == 60
+    assert keyframe_count(10, 6, 4) == 61
+
+@pytest.mark.parametrize("count,factor", [(2, 4), (9, 4), (20, 5), (1, 3)])
+def test_blend_interpolate_frame_count(count, factor):
+    frames = blend_interpolate(ramp(count), factor)
+    assert len(frames) == (count - 1) * factor + 1
+
+def test_blend_interpolate_keeps_keyframes_and_blends_between():
+    frames = blend_interpolate(ramp(3), 4)
+    assert [int(frame[0, 0, 0]) for frame in frames] == [0, 2, 4, 6, 8, 10, 12, 14, 16]
+
+@pytest.mark.parametrize("method", ["blend", "flow"])
+def test_streamed_segments_match_whole_video(method):
+    if method == "flow":
+        pytest.importorskip("cv2")
+    keyframes = ramp(11)
+    whole = KeyframeInterpolator(4, method).interpolate(keyframes)
+
+    interpolator = KeyframeInterpolator(4, method)
+    streamed = np.concatenate([interpolator.interpolate(keyframes[i:i + 4]) for i in range(0, 11, 4)])
+
+    assert len(streamed) == (11 - 1) * 4 + 1
+    assert np.array_equal(streamed, whole)
+
+@pytest.mark.parametrize("method", ["none", "ffmpeg"])
+def test_methods_without_in_memory_interpolation_pass_keyframes_through(method):
+    keyframes = ramp(5)
+    assert np.array_equal(KeyframeInterpolator(4, method).interpolate(keyframes), keyframes)
@@ -0,0 +1,94 @@
+import json
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from job_checkpoint import JobCheckpoint, generate_segmented
+
+PARAMS = {"style": "cinematic", "prompt": "a fox", "duration": 2}
+
+def make_frames(count, start=0):
+    return [Image.fromarray(np.full((4, 6, 3), start + i, dtype=np.uint8)) for i in range(count)]
+
+def pixel_values(frames):
+    return [int(np.asarray(frame)[0, 0, 0]) for frame in frames]
+
+def resume_frames(checkpoint):
+    frames = []
+    count, conditioning = checkpoint.resume(frames.extend)
+    assert count == len(frames)
+    return frames, conditioning
+
+def checkpoint_with_segments(directory, *sizes):
+    checkpoint = JobCheckpoint(str(directory), "job", PARAMS)
+    start = 0
+    for size in sizes:
+        checkpoint.save_segment(make_frames(size, start))
+        start += size
+    checkpoint.close()
+    return JobCheckpoint(str(directory), "job", PARAMS)
+
+def test_resume_returns_frames_and_last_conditioning_frame(tmp_path):
+    checkpoint = checkpoint_with_segments(tmp_path, 3, 2)
+    frames, conditioning = resume_frames(checkpoint)
+    assert pixel_values(frames) == [0, 1, 2, 3, 4]
+    assert np.asarray(conditioning)[0, 0, 0] == 4
+
+def test_checksum_mismatch_drops_that_segment_and_the_rest(tmp_path):
+    checkpoint = checkpoint_with_segments(tmp_path, 2, 2, 2)
+    np.save(tmp_path / "segment_0001.npy", np.zeros((2, 4, 6, 3), dtype=np.uint8))
+
+    frames, conditioning = resume_frames(checkpoint)
+
+    assert pixel_values(frames) == [0, 1]
+    assert np.asarray(conditioning)[0, 0, 0] == 1
+    manifest = json.loads((tmp_path / "manifest.json").read_text())
+    assert [segment["file"] for segment in manifest["segments"]] == ["segment_0000.npy"]
+    assert not (tmp_path / "segment_0002.npy").exists()
+
+@pytest.mark.parametrize("size", [0, 100])
+def test_empty_or_truncated_segment_is_regenerated(tmp_path, size):
+    checkpoint = checkpoint_with_segments(tmp_path, 2, 2)
+    path = tmp_path / "segment_0001.npy"
+    path.write_bytes(path.read_bytes()[:size])
+
+    frames, _ = resume_frames(checkpoint)
+    assert pixel_values(frames) == [0, 1]
+
+def test_missing_segment_is_regenerated(tmp_path):
+    checkpoint = checkpoint_with_segments(tmp_path, 2, 2)
+    os.remove(tmp_path / "segment_0000.npy")
+    frames, conditioning = resume_frames(checkpoint)
+    assert frames == [] and conditioning is None
+
+def test_changed_parameters_start_over(tmp_path):
+    checkpoint_with_segments(tmp_path, 2).close()
+    checkpoint = JobCheckpoint(str(tmp_path), "job", dict(PARAMS, duration=5))
+    assert resume_frames(checkpoint) == ([], None)
+    assert not (tmp_path / "segment_0000.npy").exists()
+
+def test_second_open_of_a_running_job_fails_fast(tmp_path):
+    checkpoint = JobCheckpoint(str(tmp_path), "job", PARAMS)
+    with pytest.raises(RuntimeError, match="already running"):
+        JobCheckpoint(str(tmp_path), "job", PARAMS)
+    checkpoint.finish("out.mp4")
+    JobCheckpoint(str(tmp_path), "job", PARAMS).close()
+
+def test_generate_segmented_resumes_after_last_good_segment(tmp_path):
+    calls, frames = [], []
+
+    def generate(image, start, count):
+        calls.append((start, count, int(np.asarray(image)[0, 0, 0])))
+        return make_frames(count, start)
+
+    checkpoint_with_segments(tmp_path, 4).close()
+    job = {"num_frames": 10, "image": make_frames(1, 200)[0],
+           "checkpoint": JobCheckpoint(str(tmp_path), "job", PARAMS)}
+    assert generate_segmented(job, generate, frames.extend, segment_frames=4) == 10
+
+    # Resumed frames are streamed first, then each new segment in order
+    assert pixel_values(frames) == list(range(10))
+    # Conditioned on the last frame of the resumed segment, then of each new one
+    assert calls == [(4, 4, 3), (8, 2, 7)]
@@ -0,0 +1,23 @@
+import output_catalog
+from output_catalog import OutputCatalog, catalog_path
+
+def test_catalog_path_defaults_to_one_shared_location(monkeypatch):
+    monkeypatch.delenv("OUTPUT_CATALOG_DB", raising=False)
+    assert catalog_path() == output_catalog.DEFAULT_CATALOG_DB
+    monkeypatch.setenv("OUTPUT_CATALOG_DB", "/data/catalog.db")
+    assert catalog_path() == "/data/catalog.db"
+    assert catalog_path("explicit.db") == "explicit.db"
+
+def test_recording_a_job_output_twice_keeps_one_row(tmp_path):
+    catalog = OutputCatalog(str(tmp_path / "catalog.db"))
+    try:
+        metadata = {"prompt": "a fox", "resolution": "720p", "duration": 2}
+        first = catalog.record("video", "out.mp4", metadata, style="cinematic", job_id="job_1")
+        retried = catalog.record("video", "out.mp4", metadata, style="cinematic", job_id="job_1")
+        stitched = catalog.record("stitched", "out.mp4", metadata, job_id="job_1")
+        rows = catalog.find(job_id="job_1")
+    finally:
+        catalog.close()
+    assert retried == first
+    assert stitched != first
+    assert len(rows) == 2
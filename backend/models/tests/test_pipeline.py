@@ -0,0 +1,73 @@
+import threading
+import time
+
+import pytest
+
+from pipeline import Pipeline, Stage, parse_stage_workers
+
+def test_results_come_back_in_submission_order():
+    def slow_for_early_jobs(job):
+        time.sleep(0.01 * (5 - job["index"]))
+        job["trace"] = [job["index"]]
+        return job
+
+    def record(job):
+        job["trace"].append("encoded")
+        return job
+
+    stages = [Stage("generate", slow_for_early_jobs, workers=3), Stage("encode", record, workers=2)]
+    jobs = Pipeline(stages, queue_depth=2).run([{"prompt": str(i)} for i in range(5)])
+
+    assert [job["index"] for job in jobs] == [0, 1, 2, 3, 4]
+    assert [job["trace"] for job in jobs] == [[i, "encoded"] for i in range(5)]
+    assert all(set(job["timings"]) == {"generate", "encode"} for job in jobs)
+
+def test_failed_job_skips_later_stages_without_stopping_others():
+    calls = []
+
+    def generate(job):
+        if job["index"] == 1:
+            raise RuntimeError("out of memory")
+        return job
+
+    def encode(job):
+        calls.append(job["index"])
+        return job
+
+    jobs = Pipeline([Stage("generate", generate), Stage("encode", encode)]).run([{}, {}, {}])
+
+    assert [job["error"] for job in jobs] == [None, "out of memory", None]
+    assert sorted(calls) == [0, 2]
+    assert "encode" not in jobs[1]["timings"]
+
+def test_done_jobs_pass_through_untouched():
+    calls = []
+
+    def encode(job):
+        calls.append(job["index"])
+        return job
+
+    jobs = Pipeline([Stage("encode", encode)]).run([{"done": True}, {}])
+
+    assert calls == [1]
+    assert jobs[0]["timings"] == {}
+
+def test_every_worker_thread_exits():
+    before = set(threading.enumerate())
+    stages = [Stage(name, lambda job: job, workers=3) for name in ("prepare", "generate", "encode")]
+    jobs = Pipeline(stages).run([{} for _ in range(7)])
+
+    assert len(jobs) == 7
+    assert set(threading.enumerate()) - before == set()
+
+def test_empty_job_list_shuts_down():
+    assert Pipeline([Stage("generate", lambda job: job, workers=2)]).run([]) == []
+
+def test_parse_stage_workers():
+    assert parse_stage_workers("prepare=2, encode=3") == {"prepare": 2, "encode": 3}
+    assert parse_stage_workers("") == {}
+
+def test_parse_stage_workers_keeps_generate_on_one_worker():
+    assert parse_stage_workers("generate=1") == {"generate": 1}
+    with pytest.raises(ValueError, match="generate"):
+        parse_stage_workers("prepare=2,generate=2")
@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+from trend_store import TrendStore, diff_topk
+from trending_detector import fetch_social_media_trends, run_incremental
+
+def topk(*pairs):
+    return [{"topic": topic, "count": count} for topic, count in pairs]
+
+def test_diff_topk_identical_lists_have_no_changes():
+    current = topk(("a", 10), ("b", 5))
+    assert diff_topk(current, current) == {"entered": [], "exited": [], "changed": []}
+
+def test_diff_topk_entered_and_exited():
+    changes = diff_topk(topk(("a", 10), ("b", 5)), topk(("a", 10), ("c", 7)))
+    assert changes["entered"] == [{"topic": "c", "rank": 2, "count": 7}]
+    assert changes["exited"] == [{"topic": "b", "previous_rank": 2, "previous_count": 5}]
+    assert changes["changed"] == []
+
+def test_diff_topk_rank_and_count_changes():
+    changes = diff_topk(topk(("a", 10), ("b", 5)), topk(("b", 12), ("a", 10)))
+    assert changes["entered"] == [] and changes["exited"] == []
+    assert changes["changed"] == [
+        {"topic": "b", "rank": 1, "previous_rank": 2, "count": 12, "count_delta": 7},
+        {"topic": "a", "rank": 2, "previous_rank": 1, "count": 10, "count_delta": 0},
+    ]
+
+def test_diff_topk_from_empty_previous():
+    changes = diff_topk([], topk(("a", 1)))
+    assert changes["entered"] == [{"topic": "a", "rank": 1, "count": 1}]
+
+def test_fetch_returns_share_of_elapsed_time():
+    snapshot = fetch_social_media_trends()
+    now = datetime.utcnow()
+    assert fetch_social_media_trends(since=now, until=now) == []
+    assert len(fetch_social_media_trends(since=now - timedelta(days=2), until=now)) == len(snapshot)
+
+def test_short_fetches_add_up_to_one_long_fetch():
+    start = datetime(2025, 3, 1, 12, 0)
+    long_fetch = len(fetch_social_media_trends(since=start, until=start + timedelta(hours=6)))
+    five_minutes = sum(
+        len(fetch_social_media_trends(since=start + timedelta(minutes=5 * i),
+                                      until=start + timedelta(minutes=5 * (i + 1))))
+        for i in range(72)
+    )
+    assert long_fetch > 0
+    assert five_minutes == long_fetch
+
+def test_hourly_incremental_runs_keep_ingesting(tmp_path):
+    store = TrendStore(str(tmp_path / "trends.db"))
+    start = datetime(2025, 3, 1, 12, 0)
+    try:
+        run_incremental(store, 24, 168, now=start)
+        before = store.window_counts(24, start + timedelta(hours=1))
+        run_incremental(store, 24, 168, now=start + timedelta(hours=1))
+        after = store.window_counts(24, start + timedelta(hours=1))
+    finally:
+        store.close()
+    total = lambda counts: sum(sum(sources.values()) for sources in counts.values())
+    assert total(after) > total(before)
+
+def test_back_to_back_incremental_runs_do_not_double_count(tmp_path):
+    store = TrendStore(str(tmp_path / "trends.db"))
+    try:
+        first, _ = run_incremental(store, 24, 168)
+        second, changes = run_incremental(store, 24, 168)
+    finally:
+        store.close()
+    assert second == first
+    assert changes == {"entered": [], "exited": [], "changed": []}
@@ -0,0 +1,51 @@
+import os
+import types
+
+import pytest
+
+import worker_pool
+from pipeline import Stage
+from worker_pool import WorkerPool
+
+def double(job):
+    job["output_path"] = f"out_{job['value'] * 2}"
+    return job
+
+def die_on_second_job(job):
+    if job["index"] == 1:
+        os._exit(3)  # Like an OOM kill before the worker reports anything
+    return job
+
+def test_jobs_come_back_in_order():
+    jobs = WorkerPool([Stage("double", double)], workers=2, job_memory_mb=1).run(
+        [{"value": value} for value in range(5)])
+    assert [job["output_path"] for job in jobs] == [f"out_{value * 2}" for value in range(5)]
+    assert all(job["error"] is None for job in jobs)
+
+def test_worker_death_fails_only_its_job():
+    stages = [Stage("maybe_die", die_on_second_job), Stage("double", double)]
+    jobs = WorkerPool(stages, workers=1, job_memory_mb=1).run([{"value": value} for value in range(3)])
+    assert [job["error"] for job in jobs] == [None, "Worker exited with code 3", None]
+    assert jobs[2]["output_path"] == "out_4"
+
+def test_admission_counts_running_jobs(monkeypatch):
+    monkeypatch.setattr(worker_pool, "read_meminfo_mb", lambda field="MemAvailable": 10000)
+    pool = WorkerPool([], workers=4, job_memory_mb=3000, memory_reserve_mb=1000)
+    assert pool._admit(0)
+    assert pool._admit(2)  # 10000 - 1000 - 6000 leaves room for one more
+    assert not pool._admit(3)
+
+def test_measured_memory_replaces_the_initial_guess():
+    pool = WorkerPool([], workers=2, job_memory_mb=4096)
+    pool._record_memory(1300)
+    assert pool.job_memory_mb == 1300
+    pool._record_memory(1200)
+    assert pool.job_memory_mb == 1300  # The largest peak so far
+    pool._record_memory(2000)
+    assert pool.job_memory_mb == 2000
+
+def test_refuses_to_fork_after_cuda_init(monkeypatch):
+    cuda = types.SimpleNamespace(is_initialized=lambda: True)
+    monkeypatch.setitem(worker_pool.sys.modules, "torch", types.SimpleNamespace(cuda=cuda))
+    with pytest.raises(RuntimeError, match="CUDA"):
+        WorkerPool([], workers=2)
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Trend Query Service
+Keeps trend scoring state resident and answers top-k queries over local HTTP
+"""
+
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from trend_store import TrendStore
+from trending_detector import SOURCES, score_trends
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Timeframes precomputed on every refresh; other timeframes are cached lazily
+PRECOMPUTED_TIMEFRAMES = [1, 6, 24, 168]
+MAX_LIMIT = 50
+
+# Keyword rules used to assign topics to categories
+TOPIC_CATEGORIES = {
+    "ai": ["ai", "neural", "learning", "language model", "chatgpt", "diffusion",
+           "midjourney", "dall-e", "computer vision", "natural language", "automation"],
+    "science": ["quantum", "physics", "space", "robotics"],
+    "education": ["educational", "tutorial", "explained", "how to"],
+    "style": ["cinematic", "animated", "aesthetics", "art", "cities"],
+}
+
+def categorize_topic(topic):
+    """
+    Return the first category whose keywords match the topic, or "general"
+    """
+    lowered = topic.lower()
+    for category, keywords in TOPIC_CATEGORIES.items():
+        if any(re.search(rf"\b{re.escape(keyword)}\b", lowered) for keyword in keywords):
+            return category
+    return "general"
+
+class TrendService:
+    """
+    Resident trend scorer with a TTL-invalidated cache of serialized responses
+    """
+
+    def __init__(self, store, cache_ttl=300, retention_hours=168):
+        self.store = store
+        self.cache_ttl = cache_ttl
+        self.retention_hours = retention_hours
+        self.lock = threading.Lock()
+        self.cache = {}  # (timeframe, category, limit) -> (expires_at, body)
+        self.categories = {}
+
+    def refresh(self):
+        """
+        Ingest new mentions, then rebuild the precomputed cache entries
+        """
+        now = datetime.utcnow()
+        for source, fetch in SOURCES:
+            since = self.store.get_checkpoint(source)
+            counts = Counter(fetch(since=since, until=now))
+            with self.lock:
+                self.store.ingest(source, counts, now)
+        with self.lock:
+            self.store.prune(max(self.retention_hours, max(PRECOMPUTED_TIMEFRAMES)), now)
+
+        cache = {}
+        expires_at = time.monotonic() + self.cache_ttl
+        for timeframe in PRECOMPUTED_TIMEFRAMES:
+            ranked = self._rank(timeframe, now)
+            categories = {None} | {t["category"] for t in ranked}
+            for category in categories:
+                body = self._serialize(ranked, timeframe, category, MAX_LIMIT, now)
+                cache[(timeframe, category, MAX_LIMIT)] = (expires_at, body)
+
+        # Swap the whole cache so readers never see a half-built refresh
+        self.cache = cache
+        logger.info(f"Trend cache refreshed with {len(cache)} entries")
+
+    def query(self, timeframe, category=None, limit=10):
+        """
+        Return the serialized top-k response, serving from cache when fresh
+        """
+        key = (timeframe, category, limit)
+        entry = self.cache.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+
+        # Slice the precomputed full list when available before rescoring
+        full = self.cache.get((timeframe, category, MAX_LIMIT))
+        now = datetime.utcnow()
+        if full and full[0] > time.monotonic():
+            data = json.loads(full[1])
+            data["topics"] = data["topics"][:limit]
+            body = json.dumps(data).encode()
+            expires_at = full[0]
+        else:
+            body = self._serialize(self._rank(timeframe, now), timeframe, category, limit, now)
+            expires_at = time.monotonic() + self.cache_ttl
+
+        self.cache[key] = (expires_at, body)
+        return body
+
+    def _rank(self, timeframe, now):
+        with self.lock:
+            source_counts = self.store.window_counts(timeframe, now)
+        ranked = score_trends(source_counts, top_k=None)
+        for topic in ranked:
+            category = self.categories.get(topic["topic"])
+            if category is None:
+                category = self.categories[topic["topic"]] = categorize_topic(topic["topic"])
+            topic["category"] = category
+        return ranked
+
+    def _serialize(self, ranked, timeframe, category, limit, now):
+        topics = [t for t in ranked if category is None or t["category"] == category]
+        return json.dumps({
+            "generated_at": now.isoformat(),
+            "timeframe_hours": timeframe,
+            "category": category,
+            "topics": topics[:limit]
+        }).encode()
+
+def make_handler(service):
+    """
+    Build a request handler bound to a TrendService
+    """
+    class TrendRequestHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/health":
+                self._send(200, b'{"status": "ok"}')
+                return
+            if url.path != "/trends":
+                self._send(404, b'{"error": "Not found"}')
+                return
+
+            params = parse_qs(url.query)
+            try:
+                timeframe = int(params.get("timeframe", ["24"])[0])
+                limit = int(params.get("limit", ["10"])[0])
+            except ValueError:
+                self._send(400, b'{"error": "timeframe and limit must be integers"}')
+                return
+            if timeframe < 1 or limit < 1:
+                self._send(400, b'{"error": "timeframe and limit must be positive"}')
+                return
+            limit = min(limit, MAX_LIMIT)
+            category = params.get("category", [None])[0]
+
+            self._send(200, service.query(timeframe, category, limit))
+
+        def _send(self, status, body):
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # Per-request logging would dominate the cost of a cached response
+            pass
+
+    return TrendRequestHandler
+
+def serve(host, port, state_db=None, refresh_interval=300, cache_ttl=None, retention_hours=168):
+    """
+    Run the trend query service until interrupted
+
+    Responses stay cached until the next refresh unless `cache_ttl` is given;
+    nothing changes between refreshes, so a shorter TTL only forces rescoring.
+    """
+    cache_ttl = cache_ttl or refresh_interval
+    store = TrendStore(state_db or ":memory:")
+    service = TrendService(store, cache_ttl, retention_hours)
+    service.refresh()
+
+    stop = threading.Event()
+
+    def refresh_loop():
+        while not stop.wait(refresh_interval):
+            try:
+                service.refresh()
+            except Exception as e:
+                logger.error(f"Trend refresh failed: {str(e)}")
+
+    refresher = threading.Thread(target=refresh_loop, daemon=True)
+    refresher.start()
+
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    logger.info(f"Trend service listening on http://{host}:{port}")
+    print(f"SERVING: http://{host}:{port}/trends")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Shutting down trend service")
+    finally:
+        stop.set()
+        server.server_close()
+        store.close()
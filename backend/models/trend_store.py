@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Trend State Store
+Persists bucketed trend counts between trending detector runs in SQLite
+"""
+
+import logging
+import sqlite3
+from datetime import datetime, timedelta
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BUCKET_SECONDS = 3600  # Counts are aggregated into hourly buckets
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trend_buckets (
+    topic TEXT NOT NULL,
+    source TEXT NOT NULL,
+    bucket_start INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (topic, source, bucket_start)
+);
+CREATE INDEX IF NOT EXISTS idx_trend_buckets_bucket ON trend_buckets (bucket_start);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    source TEXT PRIMARY KEY,
+    last_ingested TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS last_topk (
+    rank INTEGER PRIMARY KEY,
+    topic TEXT NOT NULL,
+    count INTEGER NOT NULL
+);
+"""
+
+def bucket_for(timestamp):
+    """
+    Return the start (epoch seconds) of the bucket containing a timestamp
+    """
+    epoch = int(timestamp.timestamp())
+    return epoch - (epoch % BUCKET_SECONDS)
+
+class TrendStore:
+    """
+    Local persistent store of per-source topic counts
+
+    Counts are kept per (topic, source, hourly bucket), which is the sketch
+    state the detector scores from: a run only adds the mentions fetched since
+    the source's last checkpoint and then reads the buckets inside its window.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def get_checkpoint(self, source):
+        """
+        Return the time a source was last ingested, or None on first run
+        """
+        row = self.conn.execute(
+            "SELECT last_ingested FROM checkpoints WHERE source = ?", (source,)
+        ).fetchone()
+        return datetime.fromisoformat(row[0]) if row else None
+
+    def ingest(self, source, topic_counts, ingested_at):
+        """
+        Add a delta of topic counts for a source and advance its checkpoint
+        """
+        bucket = bucket_for(ingested_at)
+        with self.conn:
+            self.conn.executemany(
+                """
+                INSERT INTO trend_buckets (topic, source, bucket_start, count)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (topic, source, bucket_start)
+                DO UPDATE SET count = count + excluded.count
+                """,
+                [(topic, source, bucket, count) for topic, count in topic_counts.items()]
+            )
+            self.conn.execute(
+                """
+                INSERT INTO checkpoints (source, last_ingested) VALUES (?, ?)
+                ON CONFLICT (source) DO UPDATE SET last_ingested = excluded.last_ingested
+                """,
+                (source, ingested_at.isoformat())
+            )
+        logger.info(f"Ingested {sum(topic_counts.values())} mentions from {source}")
+
+    def window_counts(self, timeframe_hours, now):
+        """
+        Return {topic: {source: count}} summed over the buckets in the window
+        """
+        since = bucket_for(now - timedelta(hours=timeframe_hours))
+        rows = self.conn.execute(
+            """
+            SELECT topic, source, SUM(count) FROM trend_buckets
+            WHERE bucket_start >= ?
+            GROUP BY topic, source
+            """,
+            (since,)
+        ).fetchall()
+
+        source_counts = {}
+        for topic, source, count in rows:
+            source_counts.setdefault(topic, {})[source] = count
+        return source_counts
+
+    def prune(self, retention_hours, now):
+        """
+        Drop buckets older than the retention period
+        """
+        cutoff = bucket_for(now - timedelta(hours=retention_hours))
+        with self.conn:
+            deleted = self.conn.execute(
+                "DELETE FROM trend_buckets WHERE bucket_start < ?", (cutoff,)
+            ).rowcount
+        if deleted:
+            logger.info(f"Pruned {deleted} expired trend buckets")
+
+    def previous_topk(self):
+        """
+        Return the top-k list emitted by the previous run
+        """
+        rows = self.conn.execute(
+            "SELECT topic, count FROM last_topk ORDER BY rank"
+        ).fetchall()
+        return [{"topic": topic, "count": count} for topic, count in rows]
+
+    def save_topk(self, trending_topics):
+        """
+        Replace the stored top-k with the list emitted by this run
+        """
+        with self.conn:
+            self.conn.execute("DELETE FROM last_topk")
+            self.conn.executemany(
+                "INSERT INTO last_topk (rank, topic, count) VALUES (?, ?, ?)",
+                [(rank, t["topic"], t["count"]) for rank, t in enumerate(trending_topics)]
+            )
+
+def diff_topk(previous, current):
+    """
+    Compute the change set between two ranked top-k lists
+    """
+    previous_ranks = {t["topic"]: (rank, t["count"]) for rank, t in enumerate(previous)}
+    current_ranks = {t["topic"]: (rank, t["count"]) for rank, t in enumerate(current)}
+
+    entered = [
+        {"topic": topic, "rank": rank + 1, "count": count}
+        for topic, (rank, count) in current_ranks.items()
+        if topic not in previous_ranks
+    ]
+    exited = [
+        {"topic": topic, "previous_rank": rank + 1, "previous_count": count}
+        for topic, (rank, count) in previous_ranks.items()
+        if topic not in current_ranks
+    ]
+    changed = []
+    for topic, (rank, count) in current_ranks.items():
+        if topic not in previous_ranks:
+            continue
+        previous_rank, previous_count = previous_ranks[topic]
+        if rank != previous_rank or count != previous_count:
+            changed.append({
+                "topic": topic,
+                "rank": rank + 1,
+                "previous_rank": previous_rank + 1,
+                "count": count,
+                "count_delta": count - previous_count
+            })
+
+    return {"entered": entered, "exited": exited, "changed": changed}
@@ -10,22 +10,64 @@ import json
 import requests
 from datetime import datetime, timedelta
 from collections import Counter
+import math
 import re
 
+from trend_store import TrendStore, diff_topk
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+SIMULATED_WINDOW_HOURS = 24  # Period the mentions of a simulated snapshot are spread over
+SIMULATED_ORIGIN = datetime(2024, 1, 1)  # Fixed start of the simulated mention stream
+
 def parse_args():
     parser = argparse.ArgumentParser(description='Detect trending topics from various sources')
     parser.add_argument('--timeframe', type=int, default=24, help='Timeframe in hours to analyze')
-    parser.add_argument('--output_file', type=str, required=True, help='Output file for trending topics')
-    return parser.parse_args()
+    parser.add_argument('--output_file', type=str, help='Output file for trending topics')
+    parser.add_argument('--state_db', type=str, help='SQLite trend state store for incremental runs')
+    parser.add_argument('--retention_hours', type=int, default=168, help='Hours of bucketed counts kept in the state store')
+    parser.add_argument('--serve', action='store_true', help='Run as a resident trend query service')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Service bind address')
+    parser.add_argument('--port', type=int, default=8765, help='Service port')
+    parser.add_argument('--refresh_interval', type=int, default=300, help='Seconds between service refreshes')
+    parser.add_argument('--cache_ttl', type=int, help='Seconds a cached service response stays valid (default: the refresh interval)')
+    args = parser.parse_args()
+    if not args.serve and not args.output_file:
+        parser.error('--output_file is required unless --serve is given')
+    return args
+
+def simulated_mentions(count, at):
+    """
+    Mentions of a topic with `count` per window emitted between the simulation origin and `at`
+    """
+    elapsed_hours = (at - SIMULATED_ORIGIN).total_seconds() / 3600
+    return math.floor(count * elapsed_hours / SIMULATED_WINDOW_HOURS)
+
+def mentions_since(mentions, since, until=None):
+    """
+    Thin a simulated snapshot down to the mentions between `since` and `until`
+
+    The snapshot stands for SIMULATED_WINDOW_HOURS of evenly spread mentions.
+    Mentions are counted cumulatively from a fixed origin, so back-to-back
+    fetches add up to the same total as one long fetch and a short interval
+    returns the mentions whose time has come rather than rounding to nothing.
+    """
+    if since is None:
+        return mentions
+    until = until or datetime.utcnow()
+    delta = []
+    for topic, count in Counter(mentions).items():
+        new = simulated_mentions(count, until) - simulated_mentions(count, since)
+        delta.extend([topic] * min(max(new, 0), count))
+    return delta
 
-def fetch_social_media_trends():
+def fetch_social_media_trends(since=None, until=None):
     """
     Fetch trending topics from social media (simulated)
     In production, this would connect to Twitter API, Reddit API, etc.
+    and only request mentions between `since` and `until`
     """
     # Simulated trending topics from social media
     # In production, replace with actual API calls
@@ -43,11 +85,13 @@ def fetch_social_media_trends():
             "Stable Diffusion", "Midjourney", "DALL-E"
         ])
     
-    return trends
+    return mentions_since(trends, since, until)
 
-def fetch_web_search_trends():
-    """    Fetch trending topics from web search data (simulated)
+def fetch_web_search_trends(since=None, until=None):
+    """
+    Fetch trending topics from web search data (simulated)
     In production, this would connect to Google Trends API, etc.
+    and only request search volume between `since` and `until`
     """
     # Simulated search trends
     search_trends = [
@@ -57,12 +101,13 @@ def fetch_web_search_trends():
         "Neural network tutorials", "Deep learning explained"
     ] * 8  # Simulate search volume
     
-    return search_trends
+    return mentions_since(search_trends, since, until)
 
-def fetch_internal_analytics():
+def fetch_internal_analytics(since=None, until=None):
     """
     Fetch trending topics from internal analytics
     Based on user searches and content requests in your system
+    created between `since` and `until`
     """
     # This would typically connect to your MongoDB to analyze user behavior
     # For simulation, we'll create some popular topics
@@ -71,81 +116,131 @@ def fetch_internal_analytics():
         "Educational content", "Cinematic videos", "Animated tutorials"
     ] * 15  # Simulate internal popularity
     
-    return internal_trends
+    return mentions_since(internal_trends, since, until)
 
-def analyze_trends(social_trends, search_trends, internal_trends, timeframe_hours=24):
+def score_trends(source_counts, top_k=20):
     """
-    Analyze and combine trends from different sources
+    Score topics from per-source counts of the form {topic: {source: count}}
     """
-    # Combine all trends
-    all_trends = social_trends + search_trends + internal_trends
-    
-    # Count occurrences
-    trend_counts = Counter(all_trends)
-    
-    # Normalize scores based on source importance
     normalized_trends = {}
-    for trend, count in trend_counts.items():
+    for trend, counts in source_counts.items():
         # Apply weights based on source reliability
         weight = 1.0  # Base weight
         
         # Boost internal trends (more relevant to your users)
-        if trend in internal_trends:
+        if counts.get("internal"):
             weight *= 1.5
         
         # Boost search trends (indicates broader interest)
-        if trend in search_trends:
-            weight *= 1.2            
-        normalized_trends[trend] = int(count * weight)
+        if counts.get("search"):
+            weight *= 1.2
+        normalized_trends[trend] = int(sum(counts.values()) * weight)
     
     # Sort by score
     sorted_trends = sorted(normalized_trends.items(), key=lambda x: x[1], reverse=True)
     
     # Return top trends
-    return [{"topic": topic, "count": count} for topic, count in sorted_trends[:20]]
+    return [{"topic": topic, "count": count} for topic, count in sorted_trends[:top_k]]
 
-def save_trending_topics(trending_topics, output_file):
+def analyze_trends(social_trends, search_trends, internal_trends, timeframe_hours=24):
+    """
+    Analyze and combine trends from different sources
+    """
+    source_counts = {}
+    for source, trends in (("social", social_trends), ("search", search_trends), ("internal", internal_trends)):
+        for trend, count in Counter(trends).items():
+            source_counts.setdefault(trend, {})[source] = count
+    
+    return score_trends(source_counts)
+
+def run_incremental(store, timeframe_hours, retention_hours, now=None):
+    """
+    Ingest only the mentions fetched since each source's checkpoint, then
+    score the stored window and diff it against the previous run
+    """
+    now = now or datetime.utcnow()
+    
+    for source, fetch in SOURCES:
+        since = store.get_checkpoint(source)
+        logger.info(f"Fetching {source} trends since {since.isoformat() if since else 'the beginning'}...")
+        store.ingest(source, Counter(fetch(since=since, until=now)), now)
+    
+    store.prune(max(retention_hours, timeframe_hours), now)
+    
+    logger.info("Analyzing trends...")
+    trending_topics = score_trends(store.window_counts(timeframe_hours, now))
+    changes = diff_topk(store.previous_topk(), trending_topics)
+    store.save_topk(trending_topics)
+    
+    return trending_topics, changes
+
+def save_trending_topics(trending_topics, output_file, timeframe_hours=24, changes=None):
     """
     Save trending topics to file
     """
     data = {
         "generated_at": datetime.utcnow().isoformat(),
-        "timeframe_hours": 24,
+        "timeframe_hours": timeframe_hours,
         "topics": trending_topics
     }
+    if changes is not None:
+        data["changes"] = changes
     
     with open(output_file, 'w') as f:
         json.dump(data, f, indent=2)
     
     logger.info(f"Trending topics saved to {output_file}")
 
+# Sources ingested by incremental runs, keyed by the name stored in the state db
+SOURCES = [
+    ("social", fetch_social_media_trends),
+    ("search", fetch_web_search_trends),
+    ("internal", fetch_internal_analytics),
+]
+
 def main():
     args = parse_args()
     
+    if args.serve:
+        from trend_service import serve
+        serve(args.host, args.port, args.state_db, args.refresh_interval,
+              args.cache_ttl, args.retention_hours)
+        return
+    
     logger.info(f"Starting trending topic detection for last {args.timeframe} hours")
     
     try:
-        # Fetch trends from different sources
-        logger.info("Fetching social media trends...")
-        social_trends = fetch_social_media_trends()
+        changes = None
+        if args.state_db:
+            # Incremental run against the persistent state store
+            store = TrendStore(args.state_db)
+            try:
+                trending_topics, changes = run_incremental(store, args.timeframe, args.retention_hours)
+            finally:
+                store.close()
+        else:
+            # Fetch trends from different sources
+            logger.info("Fetching social media trends...")
+            social_trends = fetch_social_media_trends()
+            
+            logger.info("Fetching web search trends...")
+            search_trends = fetch_web_search_trends()
+            
+            logger.info("Fetching internal analytics...")
+            internal_trends = fetch_internal_analytics()
+            
+            # Analyze trends
+            logger.info("Analyzing trends...")
+            trending_topics = analyze_trends(
+                social_trends, 
+                search_trends, 
+                internal_trends, 
+                args.timeframe
+            )
         
-        logger.info("Fetching web search trends...")
-        search_trends = fetch_web_search_trends()
-        
-        logger.info("Fetching internal analytics...")
-        internal_trends = fetch_internal_analytics()
-        
-        # Analyze trends
-        logger.info("Analyzing trends...")
-        trending_topics = analyze_trends(
-            social_trends, 
-            search_trends, 
-            internal_trends, 
-            args.timeframe
-        )
-        
-        # Save results        logger.info("Saving trending topics...")
-        save_trending_topics(trending_topics, args.output_file)
+        # Save results
+        logger.info("Saving trending topics...")
+        save_trending_topics(trending_topics, args.output_file, args.timeframe, changes)
         
         logger.info(f"Trending topic detection completed!")
         logger.info(f"Found {len(trending_topics)} trending topics")
@@ -155,6 +250,10 @@ def main():
         for i, topic in enumerate(trending_topics[:5]):
             print(f"  {i+1}. {topic['topic']} ({topic['count']} mentions)")
         
+        if changes is not None:
+            print(f"TREND_CHANGES: {len(changes['entered'])} entered, "
+                  f"{len(changes['exited'])} exited, {len(changes['changed'])} changed")
+        
     except Exception as e:
         logger.error(f"Trending topic detection failed: {str(e)}")
         print(f"ERROR: {str(e)}")
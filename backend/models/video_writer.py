@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Streaming Video Writer
+Interpolates, upscales and encodes a job's keyframes segment by segment, piping
+raw frames to FFmpeg so a long video is never held in memory
+"""
+
+import logging
+import os
+import subprocess
+import tempfile
+
+import numpy as np
+
+from frame_dedupe import VFRWriter
+from frame_interpolation import KeyframeInterpolator
+from upscaler import upscale_filter, upscale_frames
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class RawVideoWriter:
+    """
+    H.264 encoder fed raw RGB frames through FFmpeg's stdin as they arrive
+
+    FFmpeg starts with the first batch, once the frame size is known.
+    `resize(batch)` is applied to each batch before it is written, `filters`
+    is an FFmpeg filter chain applied while encoding, and `max_frames` caps
+    the encoded frame count.
+    """
+
+    def __init__(self, output_path, fps, filters=None, max_frames=None, resize=None):
+        self.output_path = output_path
+        self.fps = fps
+        self.filters = filters or []
+        self.max_frames = max_frames
+        self.resize = resize
+        self.frames_written = 0
+        self.process = None
+        self.log = None
+        self.closed_early = False  # FFmpeg stopped reading, e.g. at max_frames
+
+    def _start(self, width, height):
+        cmd = [
+            'ffmpeg', '-y', '-nostats', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+            '-s', f'{width}x{height}', '-r', str(self.fps),
+            '-i', '-'
+        ]
+        if self.filters:
+            cmd += ['-vf', ','.join(self.filters)]
+        if self.max_frames is not None:
+            cmd += ['-frames:v', str(self.max_frames)]
+        cmd += ['-c:v', 'libx264', '-pix_fmt', 'yuv420p', self.output_path]
+        logger.info(f"Streaming frames to FFmpeg: {' '.join(cmd)}")
+        # stderr goes to a file: an unread pipe fills up and stalls FFmpeg while we block writing stdin
+        self.log = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=self.log)
+
+    def write(self, frames):
+        """
+        Append a uint8 (N, H, W, 3) batch of frames
+        """
+        if self.resize:
+            frames = self.resize(frames)
+        if self.process is None:
+            self._start(frames.shape[2], frames.shape[1])
+        if self.closed_early:
+            return
+        try:
+            self.process.stdin.write(np.ascontiguousarray(frames).data)
+            self.frames_written += len(frames)
+        except BrokenPipeError:
+            # Either FFmpeg reached max_frames or it failed; fail now rather than after the whole video
+            self.closed_early = True
+            if self.process.wait() != 0:
+                self.close()
+
+    def close(self):
+        """
+        Wait for FFmpeg to finish the file; a failed encode leaves no output behind
+        """
+        if self.process is None:
+            raise Exception("No frames to encode")
+        try:
+            self.process.stdin.close()
+        except BrokenPipeError:
+            pass
+        self.process.wait()
+        self.log.seek(0)
+        errors = self.log.read().decode(errors='replace')
+        self.log.close()
+        if self.process.returncode != 0:
+            self._remove_output()
+            raise Exception(f"FFmpeg encoding failed: {errors}")
+        logger.info(f"Encoded {self.frames_written} streamed frames to {self.output_path}")
+
+    def abort(self):
+        """
+        Stop FFmpeg and remove the partial output
+        """
+        if self.process is not None:
+            self.process.kill()
+            self.process.wait()
+            self.log.close()
+        self._remove_output()
+
+    def _remove_output(self):
+        if os.path.exists(self.output_path):
+            os.remove(self.output_path)
+
+class VideoStream:
+    """
+    Interpolate, post-process and encode one job's keyframes a segment at a time
+
+    Each segment is interpolated against the last keyframe of the previous
+    one, trimmed to the job's duration, passed through
+    `transform(frames, first_index, fps)` (which edits the batch in place and
+    returns it) and handed to the encoder, so memory holds one segment of
+    frames however long the video is. The FFmpeg interpolator and upscaler run
+    as filters inside the encoder. A positive `dedupe_threshold` merges
+    near-identical frames into a variable-frame-rate file.
+    """
+
+    def __init__(self, output_path, job, transform=None, dedupe_threshold=0):
+        self.output_path = output_path
+        self.transform = transform
+        self.interpolator = KeyframeInterpolator(job["interpolation_factor"], job["interpolation"])
+        self.frame_limit = int(job["duration"] * job["fps"])
+        self.max_frames = None
+        self.fps = job["fps"]  # Rate of the frames fed to the encoder
+        self.frames_in = 0
+        self.generation_size = None
+
+        filters = []
+        if job["interpolation"] == "ffmpeg" and job["interpolation_factor"] > 1:
+            # The encoder is fed keyframes and interpolates them itself
+            self.fps = job["keyframe_fps"]
+            # minterpolate stops a few frames short of its last input; a cloned tail frame covers that
+            filters += ["tpad=stop_mode=clone:stop=1", f"minterpolate=fps={job['fps']}:mi_mode=mci"]
+            self.max_frames, self.frame_limit = self.frame_limit, None
+            dedupe_threshold = 0  # minterpolate writes a constant frame rate, so merging would be undone
+
+        resize = None
+        upscaler = job.get("upscaler")
+        if upscaler == "ffmpeg":
+            filters.append(upscale_filter(job["resolution"]))
+        elif upscaler:
+            resize = lambda frames: upscale_frames(frames, job["resolution"], upscaler)
+
+        if dedupe_threshold > 0:
+            self.writer = VFRWriter(output_path, self.fps, dedupe_threshold, filters, resize)
+        else:
+            self.writer = RawVideoWriter(output_path, self.fps, filters, self.max_frames, resize)
+
+    def write_segment(self, keyframes):
+        """
+        Interpolate one segment of keyframes and send its frames to the encoder
+        """
+        frames = self.interpolator.interpolate(keyframes)
+        if self.generation_size is None:
+            self.generation_size = (frames.shape[2], frames.shape[1])
+        if self.frame_limit is not None:
+            frames = frames[:max(self.frame_limit - self.frames_in, 0)]
+        if not len(frames):
+            return
+        if self.transform:
+            frames = self.transform(frames, self.frames_in, self.fps)
+        self.writer.write(frames)
+        self.frames_in += len(frames)
+
+    @property
+    def durations(self):
+        """
+        Per-frame durations of a merged variable-frame-rate stream, or None
+        """
+        return getattr(self.writer, "durations", None)
+
+    @property
+    def encoded_frames(self):
+        if self.durations is not None:
+            return len(self.durations)
+        return self.max_frames if self.max_frames is not None else self.frames_in
+
+    def close(self):
+        self.writer.close()
+
+    def abort(self):
+        self.writer.abort()
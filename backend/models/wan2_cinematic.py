@@ -15,18 +15,40 @@ import numpy as np
 import logging
 import json
 
+from job_checkpoint import generate_segmented, open_checkpoint
+from output_catalog import add_catalog_args, catalog_path, record_output
+from pipeline import Pipeline, Stage, add_pipeline_args, load_jobs, parse_stage_workers, report_jobs
+from worker_pool import WorkerPool, add_worker_pool_args
+from conditioning_cache import add_conditioning_cache_args, cached_conditioning
+from frame_interpolation import add_interpolation_args, keyframe_count, resolve_interpolation
+from stub_model import StubVideoPipeline, add_stub_model_args
+from upscaler import PREVIEW_FRAMES, PREVIEW_STEPS, add_resolution_args, resolution_size
+from video_writer import VideoStream
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+MODEL_ID = "stabilityai/stable-video-diffusion-img2vid-xt"
+
 def parse_args():
     parser = argparse.ArgumentParser(description='Generate cinematic videos using Wan 2.1 model')
-    parser.add_argument('--prompt', type=str, required=True, help='Text prompt for video generation')
+    parser.add_argument('--prompt', type=str, help='Text prompt for video generation')
     parser.add_argument('--duration', type=int, default=300, help='Duration in seconds')
     parser.add_argument('--resolution', type=str, default='1080p', help='Resolution (e.g., 720p, 1080p)')
     parser.add_argument('--output_dir', type=str, required=True, help='Output directory')
     parser.add_argument('--gpu', type=bool, default=True, help='Use GPU acceleration')
-    return parser.parse_args()
+    add_resolution_args(parser)
+    add_interpolation_args(parser)
+    add_pipeline_args(parser)
+    add_catalog_args(parser)
+    add_conditioning_cache_args(parser)
+    add_stub_model_args(parser)
+    add_worker_pool_args(parser)
+    args = parser.parse_args()
+    if not args.prompt and not args.jobs_file:
+        parser.error('--prompt or --jobs_file is required')
+    return args
 
 def load_model(model_path=None):
     """
@@ -36,7 +58,7 @@ def load_model(model_path=None):
         # Use the official Stable Video Diffusion model as base
         # In production, replace with your trained Wan 2.1 model
         pipe = StableVideoDiffusionPipeline.from_pretrained(
-            "stabilityai/stable-video-diffusion-img2vid-xt",
+            MODEL_ID,
             torch_dtype=torch.float16,
             variant="fp16"
         )
@@ -46,7 +68,8 @@ def load_model(model_path=None):
         else:
             logger.warning("CUDA not available, using CPU (will be slow)")
             
-        return pipe    except Exception as e:
+        return pipe
+    except Exception as e:
         logger.error(f"Error loading model: {str(e)}")
         raise
 
@@ -75,7 +98,7 @@ def preprocess_prompt(prompt, style="cinematic"):
     
     return enhanced_prompt
 
-def generate_frames(pipe, image, num_frames, fps=7):
+def generate_frames(pipe, image, num_frames, fps=7, num_inference_steps=25):
     """
     Generate video frames using the model
     """
@@ -83,8 +106,11 @@ def generate_frames(pipe, image, num_frames, fps=7):
         # Generate video frames
         frames = pipe(
             image,
+            num_frames=num_frames,
+            height=image.height,  # Generate at the conditioning image's size
+            width=image.width,
             num_videos_per_prompt=1,
-            num_inference_steps=25,
+            num_inference_steps=num_inference_steps,
             min_guidance_scale=1.0,
             max_guidance_scale=3.0,
             fps=fps,
@@ -96,6 +122,7 @@ def generate_frames(pipe, image, num_frames, fps=7):
     except Exception as e:
         logger.error(f"Error generating frames: {str(e)}")
         raise
+
 def save_video(frames, output_path, fps=7):
     """
     Save frames to video file
@@ -115,7 +142,7 @@ def create_initial_image(prompt, resolution="1080p"):
     try:
         # Create a dummy image for demonstration
         # In production, this would use a text-to-image model like Stable Diffusion
-        width, height = (1920, 1080) if resolution == "1080p" else (1280, 720)
+        width, height = resolution_size(resolution)
         
         # Create a gradient image as placeholder
         image_array = np.zeros((height, width, 3), dtype=np.uint8)
@@ -135,65 +162,162 @@ def create_initial_image(prompt, resolution="1080p"):
         logger.error(f"Error creating initial image: {str(e)}")
         raise
 
+def prepare_job(job):
+    """
+    Pipeline stage: enhance the prompt and build the conditioning image
+    """
+    logger.info(f"Preparing job {job['index']}: '{job['prompt']}' ({job['duration']}s, {job['resolution']})")
+    job["checkpoint"] = open_checkpoint(job, "cinematic")
+    completed = job["checkpoint"].completed_output(job["output_dir"]) if job["checkpoint"] else None
+    if completed:
+        # Finished on an earlier launch; nothing left to generate
+        job["checkpoint"].close()
+        job["output_path"] = completed
+        job["done"] = True
+        return job
+    
+    job["enhanced_prompt"] = preprocess_prompt(job["prompt"], "cinematic")
+    logger.info(f"Enhanced prompt: {job['enhanced_prompt']}")
+    
+    logger.info("Creating initial image...")
+    # Build the conditioning image at the size the model will generate at
+    generation_resolution = "native" if job["generation_resolution"] == "native" else job["resolution"]
+    job["image"] = create_initial_image(job["enhanced_prompt"], generation_resolution)
+    
+    # The model generates keyframes; interpolation fills in the output frame rate
+    job["fps"] = job["keyframe_fps"] * job["interpolation_factor"]
+    job["num_frames"] = keyframe_count(job["duration"], job["keyframe_fps"], job["interpolation_factor"])
+    return job
+
+def open_stream(job):
+    """
+    Name the output file and open the encoder the generated segments stream into
+    """
+    # Create output directory if it doesn't exist
+    os.makedirs(job["output_dir"], exist_ok=True)
+    
+    # Generate output filename
+    # A stable job ID gives retries the same output name
+    suffix = job["job_id"] or int(os.urandom(4).hex(), 16)
+    output_filename = f"cinematic_{job['prompt'].replace(' ', '_')[:50]}_{suffix}.mp4"
+    return VideoStream(os.path.join(job["output_dir"], output_filename), job)
+
+def encode_job(job):
+    """
+    Pipeline stage: finish encoding the streamed frames and write the metadata file
+    """
+    stream = job["stream"]
+    output_path = stream.output_path
+    output_filename = os.path.basename(output_path)
+    
+    logger.info("Saving video...")
+    stream.close()
+    
+    # Create metadata
+    metadata = {
+        "model_used": "Wan 2.1 Cinematic",
+        "style": "cinematic",
+        "job_id": job["job_id"],
+        "prompt": job["prompt"],
+        "duration": job["duration"],
+        "resolution": job["resolution"],
+        "generation_size": "x".join(map(str, stream.generation_size)),
+        "upscaler": job["upscaler"],
+        "fps": job["fps"],
+        "keyframe_fps": job["keyframe_fps"],
+        "interpolation": job["interpolation"],
+        "interpolation_factor": job["interpolation_factor"],
+        "frame_count": int(job["duration"] * job["fps"]),
+        "output_file": output_filename
+    }
+    
+    metadata_path = output_path.replace('.mp4', '_metadata.json')
+    with open(metadata_path, 'w') as f:
+        json.dump(metadata, f, indent=2)
+    record_output(job["catalog_db"], "video", output_path, metadata, style="cinematic",
+                  job_id=job["job_id"], metadata_path=metadata_path)
+    
+    logger.info(f"Output: {output_path}")
+    logger.info(f"Metadata: {metadata_path}")
+    
+    job["output_path"] = output_path
+    if job["checkpoint"]:
+        job["checkpoint"].finish(output_filename)
+    job["stream"] = job["image"] = None
+    return job
+
 def main():
     args = parse_args()
     
-    logger.info(f"Starting cinematic video generation with prompt: '{args.prompt}'")
-    logger.info(f"Duration: {args.duration}s, Resolution: {args.resolution}")
-    
     try:
-        # Load model
-        logger.info("Loading Wan 2.1 cinematic model...")
-        pipe = load_model()        
-        # Preprocess prompt
-        enhanced_prompt = preprocess_prompt(args.prompt, "cinematic")
-        logger.info(f"Enhanced prompt: {enhanced_prompt}")
-        
-        # Create initial image
-        logger.info("Creating initial image...")
-        image = create_initial_image(enhanced_prompt, args.resolution)
+        jobs = load_jobs(args)
+        for job in jobs:
+            job.update(catalog_db=catalog_path(args.catalog_db),
+                       generation_resolution=args.generation_resolution,
+                       upscaler=args.upscaler, preview=args.preview,
+                       **resolve_interpolation(args, "cinematic"))
+        logger.info(f"Starting cinematic video generation for {len(jobs)} job(s)")
         
-        # Calculate number of frames based on duration
-        fps = 7  # Standard for SVD
-        num_frames = int(args.duration * fps)
-        logger.info(f"Generating {num_frames} frames at {fps}fps")
+        # Validate the stage layout before spending time on the model
+        workers = parse_stage_workers(args.stage_workers)
         
-        # Generate video frames
-        logger.info("Generating video frames...")
-        frames = generate_frames(pipe, image, num_frames, fps)
-        
-        # Create output directory if it doesn't exist
-        os.makedirs(args.output_dir, exist_ok=True)
-        
-        # Generate output filename
-        output_filename = f"cinematic_{args.prompt.replace(' ', '_')[:50]}_{int(os.urandom(4).hex(), 16)}.mp4"
-        output_path = os.path.join(args.output_dir, output_filename)
+        # Load model
+        logger.info("Loading Wan 2.1 cinematic model...")
+        if args.stub_model:
+            pipe = StubVideoPipeline(args.stub_step_ms)
+        else:
+            pipe = load_model()
+            # Segments, retries and pre-generation reuse conditioning images; skip re-encoding them
+            pipe = cached_conditioning(pipe, MODEL_ID, args.conditioning_cache_dir, args.conditioning_cache_entries,
+                                       args.conditioning_cache_disk_mb)
         
-        # Save video
-        logger.info("Saving video...")
-        save_video(frames, output_path, fps)
+        def preview_job(job):
+            # Low-res, low-step clip the parent can show while the full render runs
+            image = job["image"].resize(resolution_size("preview"))
+            frames = generate_frames(pipe, image, PREVIEW_FRAMES, job["keyframe_fps"], PREVIEW_STEPS)
+            # Kept out of the output directory so the chunk manager doesn't stitch it in
+            preview_dir = os.path.join(job["output_dir"], "previews")
+            preview_path = os.path.join(preview_dir, f"preview_{job['job_id'] or job['index']}.mp4")
+            os.makedirs(preview_dir, exist_ok=True)
+            save_video(frames, preview_path, job["keyframe_fps"])
+            print(f"PREVIEW: {preview_path}", flush=True)
         
-        # Create metadata
-        metadata = {
-            "model_used": "Wan 2.1 Cinematic",
-            "prompt": args.prompt,
-            "duration": args.duration,
-            "resolution": args.resolution,
-            "fps": fps,
-            "frame_count": len(frames),
-            "output_file": output_filename
-        }
+        def generate_job(job):
+            # The preview runs on this stage's thread; the pipeline isn't safe to call from two at once
+            if job["preview"]:
+                preview_job(job)
+            logger.info(f"Generating {job['num_frames']} keyframes at {job['keyframe_fps']}fps")
+            # Each segment is interpolated and piped to the encoder as soon as it exists
+            stream = open_stream(job)
+            try:
+                generate_segmented(
+                    job, lambda image, start, count: generate_frames(pipe, image, count, job["keyframe_fps"]),
+                    stream.write_segment
+                )
+            except Exception:
+                stream.abort()
+                raise
+            job["stream"] = stream
+            return job
         
-        metadata_path = output_path.replace('.mp4', '_metadata.json')
-        with open(metadata_path, 'w') as f:
-            json.dump(metadata, f, indent=2)
+        stages = [
+            Stage("prepare", prepare_job, workers.get("prepare", 1)),
+            Stage("generate", generate_job, workers.get("generate", 1)),
+            Stage("encode", encode_job, workers.get("encode", 1)),
+        ]
+        if args.workers > 1:
+            # Forked workers share the loaded weights copy-on-write
+            runner = WorkerPool(stages, args.workers, args.threads_per_worker,
+                                args.job_memory_mb, args.memory_reserve_mb)
+        else:
+            runner = Pipeline(stages, args.queue_depth)
+        jobs = runner.run(jobs)
         
-        logger.info(f"Video generation completed successfully!")
-        logger.info(f"Output: {output_path}")
-        logger.info(f"Metadata: {metadata_path}")
+        logger.info(f"Video generation completed!")
         
         # Print completion message for parent process
-        print(f"SUCCESS: Video generated at {output_path}")        
+        sys.exit(report_jobs(jobs, "Video"))
+        
     except Exception as e:
         logger.error(f"Video generation failed: {str(e)}")
         print(f"ERROR: {str(e)}")
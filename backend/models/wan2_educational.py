@@ -10,24 +10,49 @@ import sys
 import torch
 from diffusers import StableVideoDiffusionPipeline
 from diffusers.utils import load_image, export_to_video
-from PIL import Image, ImageDraw, ImageFont
-import numpy as np
+from PIL import Image
 import logging
 import json
 from datetime import datetime
 
+from job_checkpoint import generate_segmented, open_checkpoint
+from output_catalog import add_catalog_args, catalog_path, record_output
+from pipeline import Pipeline, Stage, add_pipeline_args, load_jobs, parse_stage_workers, report_jobs
+from worker_pool import WorkerPool, add_worker_pool_args
+from conditioning_cache import add_conditioning_cache_args, cached_conditioning
+from frame_dedupe import add_dedupe_args
+from frame_interpolation import add_interpolation_args, keyframe_count, resolve_interpolation
+from stub_model import StubVideoPipeline, add_stub_model_args
+from upscaler import PREVIEW_FRAMES, PREVIEW_STEPS, add_resolution_args, resolution_size
+from video_writer import VideoStream
+from text_renderer import composite_overlays, get_background, title_overlay
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+MODEL_ID = "stabilityai/stable-video-diffusion-img2vid-xt"
+
 def parse_args():
     parser = argparse.ArgumentParser(description='Generate educational videos using Wan 2.1 model')
-    parser.add_argument('--prompt', type=str, required=True, help='Text prompt for video generation')
+    parser.add_argument('--prompt', type=str, help='Text prompt for video generation')
     parser.add_argument('--duration', type=int, default=300, help='Duration in seconds')
     parser.add_argument('--resolution', type=str, default='1080p', help='Resolution (e.g., 720p, 1080p)')
     parser.add_argument('--output_dir', type=str, required=True, help='Output directory')
     parser.add_argument('--gpu', type=bool, default=True, help='Use GPU acceleration')
-    return parser.parse_args()
+    parser.add_argument('--title_overlay', action='store_true', help='Composite the lesson title onto every generated frame')
+    add_resolution_args(parser)
+    add_interpolation_args(parser)
+    add_dedupe_args(parser)
+    add_pipeline_args(parser)
+    add_catalog_args(parser)
+    add_conditioning_cache_args(parser)
+    add_stub_model_args(parser)
+    add_worker_pool_args(parser)
+    args = parser.parse_args()
+    if not args.prompt and not args.jobs_file:
+        parser.error('--prompt or --jobs_file is required')
+    return args
 
 def load_educational_model(model_path=None):
     """
@@ -37,7 +62,7 @@ def load_educational_model(model_path=None):
         # Use the official Stable Video Diffusion model as base
         # In production, replace with your trained educational-specific model
         pipe = StableVideoDiffusionPipeline.from_pretrained(
-            "stabilityai/stable-video-diffusion-img2vid-xt",
+            MODEL_ID,
             torch_dtype=torch.float16,
             variant="fp16"
         )
@@ -46,7 +71,8 @@ def load_educational_model(model_path=None):
             pipe = pipe.to("cuda")
         else:
             logger.warning("CUDA not available, using CPU (will be slow)")
-                    return pipe
+            
+        return pipe
     except Exception as e:
         logger.error(f"Error loading educational model: {str(e)}")
         raise
@@ -70,60 +96,31 @@ def create_educational_image(prompt, resolution="1080p"):
     Create an educational-style image with text overlays
     """
     try:
-        width, height = (1920, 1080) if resolution == "1080p" else (1280, 720)
+        width, height = resolution_size(resolution)
         
-        # Create a clean educational background
-        image_array = np.ones((height, width, 3), dtype=np.uint8) * 240  # Light gray
-        
-        # Convert to PIL Image for drawing
-        image = Image.fromarray(image_array)
-        draw = ImageDraw.Draw(image)
+        # Start from the cached background with its diagram area already drawn
+        image_array = get_background(width, height).copy()
         
         # Add title text (first part of prompt)
         title_words = prompt.split()[:5]  # First 5 words as title
         title = " ".join(title_words)
         
-        try:
-            # Try to use a system font
-            font = ImageFont.truetype("/system/fonts/Roboto-Regular.ttf", 60)
-        except:
-            # Fallback to default font
-            font = ImageFont.load_default()
-        
-        # Draw title
-        bbox = draw.textbbox((0, 0), title, font=font)
-        text_width = bbox[2] - bbox[0]
-        text_height = bbox[3] - bbox[1]
-        
-        title_x = (width - text_width) // 2        title_y = height // 4
-        
-        # Add shadow for better readability
-        draw.text((title_x+2, title_y+2), title, fill=(100, 100, 100), font=font)
-        draw.text((title_x, title_y), title, fill=(0, 0, 0), font=font)
-        
-        # Add some educational elements
-        # Draw a simple diagram area
-        diagram_x, diagram_y = width // 4, height // 2
-        diagram_w, diagram_h = width // 2, height // 4
-        
-        draw.rectangle([diagram_x, diagram_y, diagram_x + diagram_w, diagram_y + diagram_h], 
-                      outline=(100, 100, 200), width=3)
-        
-        # Add placeholder text in diagram
-        try:
-            small_font = ImageFont.truetype("/system/fonts/Roboto-Regular.ttf", 30)
-        except:
-            small_font = ImageFont.load_default()
-            
-        draw.text((diagram_x + 20, diagram_y + 20), "Educational Diagram", 
-                 fill=(100, 100, 200), font=small_font)
+        composite_overlays(image_array[None], [title_overlay(title, height)])
         
-        return image
+        return Image.fromarray(image_array)
     except Exception as e:
         logger.error(f"Error creating educational image: {str(e)}")
         raise
 
-def generate_educational_frames(pipe, image, num_frames, fps=7):
+def add_title_overlay(frames, title, fps, first_index=0):
+    """
+    Composite the lesson title in place onto a batch of frames (N, H, W, 3)
+    starting at `first_index`, fading in over the first second of the video
+    """
+    overlay = title_overlay(title, frames.shape[1], fade_frames=fps)
+    return composite_overlays(frames, [overlay], first_index)
+
+def generate_educational_frames(pipe, image, num_frames, fps=7, num_inference_steps=25):
     """
     Generate educational video frames using the model
     """
@@ -131,8 +128,11 @@ def generate_educational_frames(pipe, image, num_frames, fps=7):
         # Generate video frames with educational style
         frames = pipe(
             image,
+            num_frames=num_frames,
+            height=image.height,  # Generate at the conditioning image's size
+            width=image.width,
             num_videos_per_prompt=1,
-            num_inference_steps=25,
+            num_inference_steps=num_inference_steps,
             min_guidance_scale=1.0,
             max_guidance_scale=3.0,
             fps=fps,
@@ -144,6 +144,7 @@ def generate_educational_frames(pipe, image, num_frames, fps=7):
     except Exception as e:
         logger.error(f"Error generating educational frames: {str(e)}")
         raise
+
 def save_educational_video(frames, output_path, fps=7):
     """
     Save educational frames to video file
@@ -155,66 +156,171 @@ def save_educational_video(frames, output_path, fps=7):
         logger.error(f"Error saving educational video: {str(e)}")
         raise
 
+def prepare_educational_job(job):
+    """
+    Pipeline stage: enhance the prompt and build the educational conditioning image
+    """
+    logger.info(f"Preparing job {job['index']}: '{job['prompt']}' ({job['duration']}s, {job['resolution']})")
+    job["checkpoint"] = open_checkpoint(job, "educational")
+    completed = job["checkpoint"].completed_output(job["output_dir"]) if job["checkpoint"] else None
+    if completed:
+        # Finished on an earlier launch; nothing left to generate
+        job["checkpoint"].close()
+        job["output_path"] = completed
+        job["done"] = True
+        return job
+    
+    job["enhanced_prompt"] = preprocess_educational_prompt(job["prompt"])
+    logger.info(f"Enhanced prompt: {job['enhanced_prompt']}")
+    
+    logger.info("Creating educational-style image...")
+    # Build the conditioning image at the size the model will generate at
+    generation_resolution = "native" if job["generation_resolution"] == "native" else job["resolution"]
+    job["image"] = create_educational_image(job["enhanced_prompt"], generation_resolution)
+    
+    # The model generates keyframes; interpolation fills in the output frame rate
+    job["fps"] = job["keyframe_fps"] * job["interpolation_factor"]
+    job["num_frames"] = keyframe_count(job["duration"], job["keyframe_fps"], job["interpolation_factor"])
+    return job
+
+def open_stream(job):
+    """
+    Name the output file and open the encoder the generated segments stream into
+    """
+    # Create output directory if it doesn't exist
+    os.makedirs(job["output_dir"], exist_ok=True)
+    
+    # Generate output filename
+    # A stable job ID gives retries the same output name
+    suffix = job["job_id"] or int(os.urandom(4).hex(), 16)
+    output_filename = f"educational_{job['prompt'].replace(' ', '_')[:50]}_{suffix}.mp4"
+    
+    transform = None
+    if job.get("title_overlay"):
+        title = " ".join(job["prompt"].split()[:5])
+        transform = lambda frames, first_index, fps: add_title_overlay(frames, title, fps, first_index)
+    # Titled slides hold still for long stretches, so near-identical frames are merged as they stream
+    return VideoStream(os.path.join(job["output_dir"], output_filename), job,
+                       transform=transform, dedupe_threshold=job["dedupe_threshold"])
+
+def encode_educational_job(job):
+    """
+    Pipeline stage: finish encoding the streamed frames and write the metadata file
+    """
+    stream = job["stream"]
+    output_path = stream.output_path
+    output_filename = os.path.basename(output_path)
+    
+    logger.info("Saving educational video...")
+    stream.close()
+    
+    # Create metadata
+    metadata = {
+        "model_used": "Wan 2.1 Educational",
+        "style": "educational",
+        "job_id": job["job_id"],
+        "prompt": job["prompt"],
+        "duration": job["duration"],
+        "resolution": job["resolution"],
+        "generation_size": "x".join(map(str, stream.generation_size)),
+        "upscaler": job["upscaler"],
+        "fps": job["fps"],
+        "keyframe_fps": job["keyframe_fps"],
+        "interpolation": job["interpolation"],
+        "interpolation_factor": job["interpolation_factor"],
+        "frame_count": int(job["duration"] * job["fps"]),
+        "encoded_frames": stream.encoded_frames,
+        "variable_frame_rate": any(duration > 1 for duration in stream.durations or []),
+        "output_file": output_filename,
+        "generated_at": datetime.utcnow().isoformat()
+    }
+    
+    metadata_path = output_path.replace('.mp4', '_metadata.json')
+    with open(metadata_path, 'w') as f:
+        json.dump(metadata, f, indent=2)
+    record_output(job["catalog_db"], "video", output_path, metadata, style="educational",
+                  job_id=job["job_id"], metadata_path=metadata_path)
+    
+    logger.info(f"Output: {output_path}")
+    logger.info(f"Metadata: {metadata_path}")
+    
+    job["output_path"] = output_path
+    if job["checkpoint"]:
+        job["checkpoint"].finish(output_filename)
+    job["stream"] = job["image"] = None
+    return job
+
 def main():
     args = parse_args()
     
-    logger.info(f"Starting educational video generation with prompt: '{args.prompt}'")
-    logger.info(f"Duration: {args.duration}s, Resolution: {args.resolution}")
-    
     try:
-        # Load model
-        logger.info("Loading Wan 2.1 educational model...")
-        pipe = load_educational_model()
-        
-        # Preprocess prompt
-        enhanced_prompt = preprocess_educational_prompt(args.prompt)
-        logger.info(f"Enhanced prompt: {enhanced_prompt}")
-        
-        # Create educational image
-        logger.info("Creating educational-style image...")
-        image = create_educational_image(enhanced_prompt, args.resolution)
+        jobs = load_jobs(args)
+        for job in jobs:
+            job.update(catalog_db=catalog_path(args.catalog_db),
+                       title_overlay=args.title_overlay, generation_resolution=args.generation_resolution,
+                       upscaler=args.upscaler, preview=args.preview, dedupe_threshold=args.dedupe_threshold,
+                       **resolve_interpolation(args, "educational"))
+        logger.info(f"Starting educational video generation for {len(jobs)} job(s)")
         
-        # Calculate number of frames based on duration
-        fps = 7  # Standard for SVD
-        num_frames = int(args.duration * fps)
-        logger.info(f"Generating {num_frames} frames at {fps}fps")
+        # Validate the stage layout before spending time on the model
+        workers = parse_stage_workers(args.stage_workers)
         
-        # Generate video frames
-        logger.info("Generating educational video frames...")
-        frames = generate_educational_frames(pipe, image, num_frames, fps)
-        
-        # Create output directory if it doesn't exist
-        os.makedirs(args.output_dir, exist_ok=True)
+        # Load model
+        logger.info("Loading Wan 2.1 educational model...")
+        if args.stub_model:
+            pipe = StubVideoPipeline(args.stub_step_ms)
+        else:
+            pipe = load_educational_model()
+            # Segments, retries and pre-generation reuse conditioning images; skip re-encoding them
+            pipe = cached_conditioning(pipe, MODEL_ID, args.conditioning_cache_dir, args.conditioning_cache_entries,
+                                       args.conditioning_cache_disk_mb)
         
-        # Generate output filename
-        output_filename = f"educational_{args.prompt.replace(' ', '_')[:50]}_{int(os.urandom(4).hex(), 16)}.mp4"
-        output_path = os.path.join(args.output_dir, output_filename)
+        def preview_job(job):
+            # Low-res, low-step clip the parent can show while the full render runs
+            image = job["image"].resize(resolution_size("preview"))
+            frames = generate_educational_frames(pipe, image, PREVIEW_FRAMES, job["keyframe_fps"], PREVIEW_STEPS)
+            # Kept out of the output directory so the chunk manager doesn't stitch it in
+            preview_dir = os.path.join(job["output_dir"], "previews")
+            preview_path = os.path.join(preview_dir, f"preview_{job['job_id'] or job['index']}.mp4")
+            os.makedirs(preview_dir, exist_ok=True)
+            save_educational_video(frames, preview_path, job["keyframe_fps"])
+            print(f"PREVIEW: {preview_path}", flush=True)
         
-        # Save video
-        logger.info("Saving educational video...")
-        save_educational_video(frames, output_path, fps)
-                # Create metadata
-        metadata = {
-            "model_used": "Wan 2.1 Educational",
-            "prompt": args.prompt,
-            "duration": args.duration,
-            "resolution": args.resolution,
-            "fps": fps,
-            "frame_count": len(frames),
-            "output_file": output_filename,
-            "generated_at": datetime.utcnow().isoformat()
-        }
+        def generate_job(job):
+            # The preview runs on this stage's thread; the pipeline isn't safe to call from two at once
+            if job["preview"]:
+                preview_job(job)
+            logger.info(f"Generating {job['num_frames']} keyframes at {job['keyframe_fps']}fps")
+            # Each segment is interpolated, titled and piped to the encoder as soon as it exists
+            stream = open_stream(job)
+            try:
+                generate_segmented(
+                    job, lambda image, start, count: generate_educational_frames(pipe, image, count, job["keyframe_fps"]),
+                    stream.write_segment
+                )
+            except Exception:
+                stream.abort()
+                raise
+            job["stream"] = stream
+            return job
         
-        metadata_path = output_path.replace('.mp4', '_metadata.json')
-        with open(metadata_path, 'w') as f:
-            json.dump(metadata, f, indent=2)
+        stages = [
+            Stage("prepare", prepare_educational_job, workers.get("prepare", 1)),
+            Stage("generate", generate_job, workers.get("generate", 1)),
+            Stage("encode", encode_educational_job, workers.get("encode", 1)),
+        ]
+        if args.workers > 1:
+            # Forked workers share the loaded weights copy-on-write
+            runner = WorkerPool(stages, args.workers, args.threads_per_worker,
+                                args.job_memory_mb, args.memory_reserve_mb)
+        else:
+            runner = Pipeline(stages, args.queue_depth)
+        jobs = runner.run(jobs)
         
-        logger.info(f"Educational video generation completed successfully!")
-        logger.info(f"Output: {output_path}")
-        logger.info(f"Meta {metadata_path}")
+        logger.info(f"Educational video generation completed!")
         
         # Print completion message for parent process
-        print(f"SUCCESS: Educational video generated at {output_path}")
+        sys.exit(report_jobs(jobs, "Educational video"))
         
     except Exception as e:
         logger.error(f"Educational video generation failed: {str(e)}")
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Pre-fork Worker Pool
+Loads a model once, then forks workers that share its weights copy-on-write
+and admits jobs only while the host has memory for them
+"""
+
+import gc
+import logging
+import multiprocessing as mp
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Job fields sent back to the parent; frames and images stay in the worker
+RESULT_KEYS = ("index", "error", "output_path", "timings", "memory_mb")
+
+def read_meminfo_mb(field="MemAvailable"):
+    """
+    Return a /proc/meminfo field in MB
+    """
+    with open("/proc/meminfo") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1]) / 1024
+    raise KeyError(field)
+
+def private_memory_mb():
+    """
+    Return this process's private (not copy-on-write shared) memory in MB
+    """
+    total_kb = 0
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            if line.startswith(("Private_Clean:", "Private_Dirty:")):
+                total_kb += int(line.split()[1])
+    return total_kb / 1024
+
+class MemorySampler:
+    """
+    Track peak private memory of the current process while a job runs
+    """
+
+    def __init__(self, interval=0.2):
+        self.interval = interval
+        self.peak = 0.0
+        self.stop = threading.Event()
+        self.thread = None
+
+    def __enter__(self):
+        self.peak = private_memory_mb()
+        self.stop.clear()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop.set()
+        self.thread.join()
+        self.peak = max(self.peak, private_memory_mb())
+
+    def _run(self):
+        while not self.stop.wait(self.interval):
+            self.peak = max(self.peak, private_memory_mb())
+
+def add_worker_pool_args(parser):
+    """
+    Add the worker pool options shared by the model scripts
+    """
+    parser.add_argument('--workers', type=int, default=1, help='Forked workers sharing one loaded model (1 = in-process pipeline; CPU models only)')
+    parser.add_argument('--threads_per_worker', type=int, default=0, help='CPU threads per worker (0 = split all cores evenly)')
+    parser.add_argument('--job_memory_mb', type=int, default=4096, help='Initial per-job memory estimate for admission control')
+    parser.add_argument('--memory_reserve_mb', type=int, default=1024, help='Memory kept free for the rest of the host')
+
+class WorkerPool:
+    """
+    Run jobs through a list of stages in forked worker processes
+
+    The stages' model must be loaded before the pool is created so the forked
+    workers inherit its weights. A job is only handed to a worker when the
+    host's available memory, less an estimate for every job still running,
+    covers one more job. `job_memory_mb` is only a guess used until the first
+    job reports its peak; from then on the estimate is the largest measured peak. Each worker has its own task queue, so
+    the parent always knows which job a worker that died was holding.
+    """
+
+    def __init__(self, stages, workers, threads_per_worker=0, job_memory_mb=4096, memory_reserve_mb=1024):
+        if "fork" not in mp.get_all_start_methods():
+            raise RuntimeError("Worker pool requires the fork start method")
+        torch = sys.modules.get("torch")
+        if torch is not None and torch.cuda.is_initialized():
+            # A forked child can't use the parent's CUDA context
+            raise RuntimeError("Worker pool can't fork after CUDA is initialized; use --workers 1 for GPU models")
+        self.stages = stages
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+        self.job_memory_mb = job_memory_mb
+        self.measured_memory_mb = None  # Largest per-job peak reported by the workers
+        self.memory_reserve_mb = memory_reserve_mb
+        self.ctx = mp.get_context("fork")
+
+    def run(self, jobs):
+        """
+        Run all jobs and return them in submission order
+        """
+        for index, job in enumerate(jobs):
+            job.setdefault("index", index)
+            job.setdefault("error", None)
+            job.setdefault("timings", {})
+        by_index = {job["index"]: job for job in jobs}
+
+        self.results = self.ctx.Queue()
+        self.inboxes = {}
+
+        # Move the loaded model out of the garbage collector's reach so the
+        # workers don't dirty its pages (and un-share them) while collecting
+        gc.freeze()
+        processes = {wid: self._spawn(wid) for wid in range(self.workers)}
+        idle = deque(processes)
+        assigned = {}  # Worker ID -> index of the job it was handed
+
+        pending = deque(jobs)
+        while pending or assigned:
+            while pending and idle and self._admit(len(assigned)):
+                wid = idle.popleft()
+                job = pending.popleft()
+                assigned[wid] = job["index"]
+                self.inboxes[wid].put(job)
+
+            try:
+                wid, payload = self.results.get(timeout=1.0)
+            except queue.Empty:
+                self._reap(processes, assigned, idle, by_index)
+                continue
+
+            assigned.pop(wid, None)
+            idle.append(wid)
+            by_index[payload["index"]].update(payload)
+            if payload.get("memory_mb"):
+                self._record_memory(payload["memory_mb"])
+
+        for wid in processes:
+            self.inboxes[wid].put(None)
+        for process in processes.values():
+            process.join()
+        gc.unfreeze()
+
+        return sorted(jobs, key=lambda job: job["index"])
+
+    def _record_memory(self, memory_mb):
+        # Measurements replace the initial guess rather than raising it
+        self.measured_memory_mb = max(self.measured_memory_mb or 0, memory_mb)
+        self.job_memory_mb = self.measured_memory_mb
+
+    def _admit(self, running):
+        if running == 0:
+            return True  # Always let one job run so the pool makes progress
+        # Running jobs may not have reached their peak yet, so count them at the estimate
+        available = read_meminfo_mb() - self.memory_reserve_mb - running * self.job_memory_mb
+        if available >= self.job_memory_mb:
+            return True
+        logger.info(f"Holding jobs: {available:.0f} MB available after {running} running job(s), "
+                    f"~{self.job_memory_mb:.0f} MB per job")
+        return False
+
+    def _spawn(self, wid):
+        # A fresh queue per process, so a dead worker's undelivered job can't reach its replacement
+        self.inboxes[wid] = self.ctx.Queue()
+        process = self.ctx.Process(target=self._worker, args=(wid, self.inboxes[wid]),
+                                   name=f"pool-worker-{wid}", daemon=True)
+        process.start()
+        return process
+
+    def _reap(self, processes, assigned, idle, by_index):
+        # Fail the job of any worker that died (e.g. OOM-killed) and replace it
+        for wid, process in list(processes.items()):
+            if process.is_alive():
+                continue
+            index = assigned.pop(wid, None)
+            if index is not None:
+                by_index[index]["error"] = f"Worker exited with code {process.exitcode}"
+                idle.append(wid)
+            logger.warning(f"Worker {wid} exited with code {process.exitcode}, restarting")
+            processes[wid] = self._spawn(wid)
+
+    def _worker(self, wid, inbox):
+        self._limit_cpu(wid)
+        while True:
+            job = inbox.get()
+            if job is None:
+                break
+
+            with MemorySampler() as sampler:
+                baseline = sampler.peak
+                for stage in self.stages:
+                    start = time.perf_counter()
+                    try:
+                        job = stage.fn(job)
+                    except Exception as e:
+                        logger.error(f"Stage '{stage.name}' failed for job {job['index']}: {str(e)}")
+                        job["error"] = str(e)
+                    job["timings"][stage.name] = time.perf_counter() - start
+                    if job["error"] is not None or job.get("done"):
+                        break
+            job["memory_mb"] = sampler.peak - baseline
+
+            self.results.put((wid, {key: job.get(key) for key in RESULT_KEYS}))
+
+    def _limit_cpu(self, wid):
+        # Give each worker its own slice of cores and a matching thread count
+        if hasattr(os, "sched_setaffinity"):
+            cpus = sorted(os.sched_getaffinity(0))
+            start = (wid * self.threads_per_worker) % len(cpus)
+            os.sched_setaffinity(0, cpus[start:start + self.threads_per_worker] or cpus)
+        try:
+            import torch
+            torch.set_num_threads(self.threads_per_worker)
+        except ImportError:
+            pass
@@ -10,6 +10,7 @@ require('dotenv').config();
 const connectDB = require('./config/database');
 const logger = require('./utils/logger');
 const errorHandler = require('./middleware/errorHandler');
+const pregenerationService = require('./services/pregenerationService');
 
 // Initialize Passport
 require('./config/passport');
@@ -92,10 +93,14 @@ const server = app.listen(PORT, () => {
   logger.info(`Environment: ${process.env.NODE_ENV || 'development'}`);
   logger.info(`API available at http://localhost:${PORT}/api/v1`);
   logger.info(`Health check at http://localhost:${PORT}/health`);
+
+  // Speculatively pre-generate trending topics while workers are idle
+  pregenerationService.start();
 });
 
 // Graceful shutdown
 process.on('SIGTERM', () => {  logger.info('SIGTERM received, shutting down gracefully');
+  pregenerationService.stop();
   server.close(() => {
     logger.info('Process terminated');
   });
@@ -3,6 +3,10 @@ const aiConfig = {
   aiServiceUrl: process.env.AI_SERVICE_URL || 'http://localhost:8000',
   aiApiKey: process.env.AI_API_KEY,
   
+  // Resident trend query service (trending_detector.py --serve)
+  trendServiceUrl: process.env.TREND_SERVICE_URL || 'http://127.0.0.1:8765',
+  trendServiceTimeout: 200, // ms before falling back to sample topics
+  
   // Video Generation Settings
   videoGeneration: {
     defaultDuration: 300, // seconds
@@ -1,8 +1,10 @@
 const asyncHandler = require('express-async-handler');
+const axios = require('axios');
 const ContentRequest = require('../models/ContentRequest');
 const User = require('../models/User');
 const GeneratedVideo = require('../models/GeneratedVideo');
 const { addToQueue } = require('../services/videoQueue');
+const aiConfig = require('../config/ai-config');
 const logger = require('../utils/logger');
 
 // @desc    Create content request
@@ -101,15 +103,27 @@ const getContentRequests = asyncHandler(async (req, res) => {
 // @access  Public
 const getTrendingTopics = asyncHandler(async (req, res) => {
   try {
-    // This could be replaced with actual trending data from your DB
-    // For now, we'll return some sample trending topics
-    const trendingTopics = [
-      { topic: 'AI Art Evolution', count: 1250 },
-      { topic: 'Future Cities', count: 980 },
-      { topic: 'Space Exploration', count: 870 },
-      { topic: 'Quantum Physics', count: 750 },
-      { topic: 'Cyberpunk Aesthetics', count: 620 }
-    ];
+    const { timeframe = 24, category, limit = 5 } = req.query;
+    let trendingTopics;
+
+    try {
+      // Served from the trend service's precomputed cache
+      const response = await axios.get(`${aiConfig.trendServiceUrl}/trends`, {
+        params: { timeframe, category, limit },
+        timeout: aiConfig.trendServiceTimeout
+      });
+      trendingTopics = response.data.topics;
+    } catch (serviceError) {
+      logger.warn(`Trend service unavailable, using sample topics: ${serviceError.message}`);
+      // Fall back to some sample trending topics
+      trendingTopics = [
+        { topic: 'AI Art Evolution', count: 1250 },
+        { topic: 'Future Cities', count: 980 },
+        { topic: 'Space Exploration', count: 870 },
+        { topic: 'Quantum Physics', count: 750 },
+        { topic: 'Cyberpunk Aesthetics', count: 620 }
+      ];
+    }
 
     res.status(200).json({
       success: true,
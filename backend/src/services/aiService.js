@@ -10,14 +10,21 @@ class AIService {
     this.modelsPath = process.env.MODELS_PATH || './models';
     this.outputPath = process.env.OUTPUT_PATH || './output';
     this.gpuEnabled = process.env.GPU_ENABLED === 'true';
+    this.runningProcesses = new Map(); // jobKey -> spawned model process
   }
 
   async generateVideo(prompt, options = {}) {
-    const { style = 'educational', duration = 300, resolution = '1080p' } = options;
+    const { style = 'educational', duration = 300, resolution = '1080p', jobKey } = options;
     
-    // Create a job ID for tracking
-    const jobId = `job_${Date.now()}_${Math.random().toString(36).substr(2, 9)}`;
+    // Create a job ID for tracking; a stable one lets retries resume from the model's checkpoint
+    const jobId = options.jobId || `job_${Date.now()}_${Math.random().toString(36).substr(2, 9)}`;
     
+    // A queue retry can start while the timed-out attempt is still running; stop it
+    // first so two processes never write the same job's checkpoint
+    if (jobKey) {
+      await this.stopRunning(jobKey);
+    }
+
     // Create output directory for this job
     const jobOutputDir = path.join(this.outputPath, jobId);
     if (!fs.existsSync(jobOutputDir)) {
@@ -44,8 +51,10 @@ class AIService {
         '--prompt', prompt,
         '--duration', duration.toString(),
         '--resolution', resolution,
-        '--output_dir', jobOutputDir,
-        '--gpu', this.gpuEnabled.toString()
+        '--output_dir', path.resolve(jobOutputDir), // The model runs from modelsPath
+        '--gpu', this.gpuEnabled.toString(),
+        '--job_id', jobId,
+        '--catalog_db', path.resolve(this.outputPath, 'catalog.db')
       ];
 
       // Spawn the AI generation process
@@ -53,6 +62,9 @@ class AIService {
         cwd: this.modelsPath,
         env: process.env
       });
+      if (jobKey) {
+        this.runningProcesses.set(jobKey, aiProcess);
+      }
 
       let stdout = '';
       let stderr = '';
@@ -67,16 +79,22 @@ class AIService {
         logger.error(`AI Process Error: ${data.toString()}`);
       });
 
-      aiProcess.on('close', (code) => {
-        if (code === 0) {
-          // Find the generated video file
-          const videoFiles = fs.readdirSync(jobOutputDir).filter(file => 
+      aiProcess.on('close', (code, signal) => {
+        if (jobKey && this.runningProcesses.get(jobKey) === aiProcess) {
+          this.runningProcesses.delete(jobKey);
+        }
+
+        if (signal) {
+          reject(new Error(`AI process was stopped by ${signal}`));
+        } else if (code === 0) {
+          // The model reports the cataloged output path; scan the directory for older models
+          const reported = stdout.match(/^SUCCESS: .* generated at (.+)$/m);
+          const videoFiles = reported ? [] : fs.readdirSync(jobOutputDir).filter(file => 
             file.endsWith('.mp4') || file.endsWith('.avi') || file.endsWith('.mov')
           );
 
-          if (videoFiles.length > 0) {
-            const videoFile = videoFiles[0];
-            const videoPath = path.join(jobOutputDir, videoFile);
+          if (reported || videoFiles.length > 0) {
+            const videoPath = reported ? reported[1].trim() : path.join(jobOutputDir, videoFiles[0]);
             
             // Generate thumbnail
             const thumbnailPath = path.join(jobOutputDir, 'thumbnail.jpg');
@@ -86,7 +104,7 @@ class AIService {
               videoPath,
               thumbnailPath,
               duration: this.estimateDuration(stdout),
-              metadata: { style, resolution, prompt }
+              metadata: { style, resolution, prompt, duration }
             });
           } else {
             reject(new Error('No video file generated'));
@@ -102,6 +120,25 @@ class AIService {
     });
   }
 
+  // Stop a running generation started with the given jobKey
+  cancel(jobKey) {
+    const aiProcess = this.runningProcesses.get(jobKey);
+    if (!aiProcess) return false;
+    aiProcess.kill('SIGTERM');
+    return true;
+  }
+
+  // Stop the process still running under a jobKey and wait for it to exit
+  async stopRunning(jobKey) {
+    const aiProcess = this.runningProcesses.get(jobKey);
+    if (!aiProcess) return;
+    logger.warn(`Stopping earlier process for ${jobKey} before starting a new one`);
+    await new Promise((resolve) => {
+      aiProcess.once('close', resolve);
+      aiProcess.kill('SIGTERM');
+    });
+  }
+
   generateThumbnail(videoPath, thumbnailPath) {
     // This would use FFmpeg to generate a thumbnail
     const ffmpeg = spawn('ffmpeg', [
@@ -130,7 +167,7 @@ class AIService {
     return 300; // Default to 5 minutes
   }
 
-  async processContentRequest(requestId) {
+  async processContentRequest(requestId, { findPregenerated } = {}) {
     const request = await ContentRequest.findById(requestId);
     if (!request) throw new Error('Request not found');
 
@@ -139,12 +176,22 @@ class AIService {
       request.status = 'processing';
       await request.save();
 
-      // Generate video using AI models
-      const result = await this.generateVideo(request.topic, {
-        style: request.style,
-        duration: request.duration,
-        resolution: '1080p'
-      });
+      // Serve a speculatively pre-generated video for trending topics when one exists
+      let result = findPregenerated
+        ? await findPregenerated(request.topic, request.style, request.duration)
+        : null;
+      if (result) {
+        logger.info(`Serving pre-generated video for request ${requestId}`);
+      } else {
+        // Generate video using AI models
+        result = await this.generateVideo(request.topic, {
+          style: request.style,
+          duration: request.duration,
+          resolution: '1080p',
+          jobKey: `request_${requestId}`,
+          jobId: `request_${requestId}`
+        });
+      }
 
       // Create generated video record
       const generatedVideo = await GeneratedVideo.create({
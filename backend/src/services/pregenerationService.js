@@ -0,0 +1,82 @@
+const axios = require('axios');
+const aiConfig = require('../config/ai-config');
+const {
+  videoQueue,
+  addSpeculativeJob,
+  hasPendingUserJobs
+} = require('./videoQueue');
+const logger = require('../utils/logger');
+
+// Relative generation cost per second of output video, per style
+const STYLE_COST = {
+  cinematic: 1.0, // SVD at 25 steps
+  educational: 0.9, // SVD with a cheaper conditioning image
+  animation: 0.3 // LTX-2 mock pipeline
+};
+
+class PregenerationService {
+  constructor() {
+    this.enabled = process.env.PREGENERATION_ENABLED === 'true';
+    this.intervalMs = parseInt(process.env.PREGENERATION_INTERVAL_MS, 10) || 60000;
+    this.maxTopics = parseInt(process.env.PREGENERATION_TOPICS, 10) || 5;
+    this.maxSpeculative = parseInt(process.env.PREGENERATION_SLOTS, 10) || 1;
+    this.duration = aiConfig.videoGeneration.defaultDuration;
+    this.timer = null;
+  }
+
+  start() {
+    if (!this.enabled || this.timer) return;
+    this.timer = setInterval(() => {
+      this.schedule().catch((error) => {
+        logger.error(`Pre-generation scheduling failed: ${error.message}`);
+      });
+    }, this.intervalMs);
+    logger.info(`Pre-generation scheduler started (every ${this.intervalMs}ms)`);
+  }
+
+  stop() {
+    clearInterval(this.timer);
+    this.timer = null;
+  }
+
+  // Rank (topic, style) pairs by trend score divided by estimated generation cost
+  planJobs(topics) {
+    const plans = [];
+    for (const { topic, count } of topics.slice(0, this.maxTopics)) {
+      for (const [style, costPerSecond] of Object.entries(STYLE_COST)) {
+        const cost = costPerSecond * this.duration;
+        plans.push({ topic, style, duration: this.duration, score: count / cost });
+      }
+    }
+    return plans.sort((a, b) => b.score - a.score);
+  }
+
+  // Enqueue the best-ranked speculative jobs while workers are otherwise idle
+  async schedule() {
+    if (await hasPendingUserJobs()) return 0;
+
+    const counts = await videoQueue.getJobCounts();
+    const freeSlots = this.maxSpeculative - counts.active - counts.waiting - counts.delayed;
+    if (freeSlots <= 0) return 0;
+
+    const response = await axios.get(`${aiConfig.trendServiceUrl}/trends`, {
+      params: { limit: this.maxTopics },
+      timeout: aiConfig.trendServiceTimeout
+    });
+
+    let enqueued = 0;
+    const plans = this.planJobs(response.data.topics);
+    for (let rank = 0; rank < plans.length && enqueued < freeSlots; rank++) {
+      // Bull priorities start at 1 for user jobs; speculative jobs follow in rank order
+      const job = await addSpeculativeJob(plans[rank], rank + 2);
+      if (job) enqueued++;
+    }
+
+    if (enqueued > 0) {
+      logger.info(`Enqueued ${enqueued} speculative pre-generation jobs`);
+    }
+    return enqueued;
+  }
+}
+
+module.exports = new PregenerationService();
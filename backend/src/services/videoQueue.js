@@ -11,29 +11,115 @@ const videoQueue = new Queue('video generation', {
   }
 });
 
-// Process video generation jobs
-videoQueue.process('generate', async (job) => {
+// Job ID of the speculative pre-generation job for a topic and style
+const pregenerationJobId = (topic, style) => {
+  const slug = topic.toLowerCase().replace(/[^a-z0-9]+/g, '_');
+  return `pregen:${style}:${slug}`;
+};
+
+// Return the result of a finished pre-generation job matching the request, if any
+const findPregeneratedVideo = async (topic, style, duration) => {
+  const job = await videoQueue.getJob(pregenerationJobId(topic, style));
+  if (!job || !(await job.isCompleted())) return null;
+  if (job.data.duration !== duration) return null;
+  return job.returnvalue;
+};
+
+// Run a user-requested video generation job
+const processGenerateJob = async (job) => {
   const { requestId } = job.data;
   logger.info(`Processing video generation job for request ${requestId}`);
-  
+
   try {
-    const result = await aiService.processContentRequest(requestId);
+    const result = await aiService.processContentRequest(requestId, {
+      findPregenerated: findPregeneratedVideo
+    });
     logger.info(`Video generation completed for request ${requestId}`);
     return result;
   } catch (error) {
     logger.error(`Video generation failed for request ${requestId}: ${error.message}`);
     throw error;
   }
+};
+
+// Run a speculative pre-generation job for a trending topic
+const processPregenerateJob = async (job) => {
+  const { topic, style, duration } = job.data;
+  logger.info(`Pre-generating ${style} video for trending topic "${topic}"`);
+
+  return aiService.generateVideo(topic, {
+    style,
+    duration,
+    resolution: '1080p',
+    jobKey: job.id,
+    jobId: job.id.replace(/[^a-zA-Z0-9_-]/g, '_')
+  });
+};
+
+const jobProcessors = {
+  generate: processGenerateJob,
+  pregenerate: processPregenerateJob
+};
+
+// One processor for every job name: each named process() call adds its own
+// concurrency in Bull, so separate handlers would render two videos at once
+videoQueue.process('*', 1, async (job) => {
+  const processJob = jobProcessors[job.name];
+  if (!processJob) {
+    throw new Error(`Unknown job type: ${job.name}`);
+  }
+  return processJob(job);
 });
 
+// Drop queued speculative jobs and stop running ones so user jobs get the workers
+const preemptSpeculativeJobs = async () => {
+  const queued = await videoQueue.getJobs(['waiting', 'delayed']);
+  for (const job of queued.filter((j) => j.name === 'pregenerate')) {
+    await job.remove();
+  }
+
+  const active = await videoQueue.getActive();
+  for (const job of active.filter((j) => j.name === 'pregenerate')) {
+    if (aiService.cancel(job.id)) {
+      logger.info(`Preempted speculative job ${job.id}`);
+    }
+  }
+};
+
+// Whether any user-requested generation is queued or running
+const hasPendingUserJobs = async () => {
+  const jobs = await videoQueue.getJobs(['active', 'waiting', 'delayed']);
+  return jobs.some((job) => job.name === 'generate');
+};
+
 // Add a job to the queue
-const addToQueue = (requestId) => {
-  return videoQueue.add('generate', { requestId }, {
+const addToQueue = async (requestId) => {
+  // Queue the user job first so the scheduler sees it and can't slip in
+  // another speculative job between the preemption and the add
+  const job = await videoQueue.add('generate', { requestId }, {
+    priority: 1,
     attempts: 3,
     backoff: 'exponential',
     timeout: 300000, // 5 minutes timeout
     delay: 1000 // 1 second delay before processing
   });
+
+  await preemptSpeculativeJobs();
+  return job;
+};
+
+// Add a speculative pre-generation job unless one already exists for the topic
+const addSpeculativeJob = async ({ topic, style, duration, score }, priority) => {
+  const jobId = pregenerationJobId(topic, style);
+  if (await videoQueue.getJob(jobId)) return null;
+
+  return videoQueue.add('pregenerate', { topic, style, duration, score }, {
+    jobId,
+    priority,
+    attempts: 1, // Preempted jobs are rescheduled by the next planning pass instead
+    removeOnFail: true,
+    timeout: 300000
+  });
 };
 
 // Listen for events
@@ -45,4 +131,10 @@ videoQueue.on('failed', (job, err) => {
   logger.error(`Job ${job.id} failed with error: ${err.message}`);
 });
 
-module.exports = { videoQueue, addToQueue };
+module.exports = {
+  videoQueue,
+  addToQueue,
+  addSpeculativeJob,
+  hasPendingUserJobs,
+  findPregeneratedVideo
+};